@@ -1,4 +1,4 @@
-from .probability_space import ProbabilitySpace, BoxModel, DeckOfCards
+from .probability_space import ProbabilitySpace, BoxModel, Empirical, DeckOfCards
 from .random_variables import RV
 from .random_processes import RandomProcess
 from .distributions import (
@@ -39,7 +39,19 @@ from .result import (
     InfiniteVector,
     DiscreteTimeFunction,
     ContinuousTimeFunction,
-    concat
+    concat,
+    vectorized
+)
+from .kernels import (
+    Kernel,
+    Stationary,
+    RBF,
+    Matern12,
+    Matern32,
+    Matern52,
+    Periodic,
+    OrnsteinUhlenbeck,
+    Brownian
 )
 from .gaussian_process import (
     GaussianProcess,
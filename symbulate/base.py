@@ -1,4 +1,5 @@
 import math
+import operator
 
 import numpy as np
 import scipy.stats as stats
@@ -80,27 +81,27 @@ class Comparable:
     """
 
     def __eq__(self, other):
-        op_func = self._comparison_factory(lambda x, y: x == y)
+        op_func = self._comparison_factory(operator.eq)
         return op_func(self, other)
 
     def __ne__(self, other):
-        op_func = self._comparison_factory(lambda x, y: x != y)
+        op_func = self._comparison_factory(operator.ne)
         return op_func(self, other)
 
     def __lt__(self, other):
-        op_func = self._comparison_factory(lambda x, y: x < y)
+        op_func = self._comparison_factory(operator.lt)
         return op_func(self, other)
 
     def __le__(self, other):
-        op_func = self._comparison_factory(lambda x, y: x <= y)
+        op_func = self._comparison_factory(operator.le)
         return op_func(self, other)
 
     def __gt__(self, other):
-        op_func = self._comparison_factory(lambda x, y: x > y)
+        op_func = self._comparison_factory(operator.gt)
         return op_func(self, other)
 
     def __ge__(self, other):
-        op_func = self._comparison_factory(lambda x, y: x >= y)
+        op_func = self._comparison_factory(operator.ge)
         return op_func(self, other)
 
 
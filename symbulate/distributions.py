@@ -1,15 +1,62 @@
+import copy
 import numbers
 import numpy as np
 import scipy.stats as stats
 import matplotlib.pyplot as plt
 
-from .probability_space import ProbabilitySpace
+from .probability_space import (ProbabilitySpace, _common_space, _compose,
+                                _identity)
 from .plot import get_next_color
-from .result import Scalar, Vector, InfiniteVector
+from .random_variables import RV
+from .result import Scalar, Vector, InfiniteVector, vectorized
+
+
+def _as_param(value):
+    # Parameters can be numbers or, for parameter sweeps,
+    # 1-D arrays of numbers (one entry per setting).
+    if isinstance(value, (list, tuple, np.ndarray)):
+        value = np.asarray(value)
+        if value.ndim > 1:
+            raise Exception("Array-valued parameters must be 1-D.")
+    return value
+
+
+def _is_integer(value):
+    # Works for both numbers and arrays of numbers.
+    return (isinstance(value, numbers.Integral) or
+            np.issubdtype(np.asarray(value).dtype, np.integer))
+
 
 class Distribution(ProbabilitySpace):
+    """Defines a probability space for a named distribution.
+
+    Each parameter can be a number or a 1-D array. If any of the
+    parameters is an array, the parameters are broadcast against
+    each other and a single draw is a Vector with one entry per
+    parameter setting, so a simulation of size n has shape
+    (n, k). All of the entries are sampled with one vectorized call.
+
+    A parameter can also be a random variable, e.g.,
+    Normal(mean=M, sd=1) with M = RV(Uniform(0, 1)). In that case,
+    a HierarchicalDistribution is returned instead.
+
+    Attributes:
+      params (dict): the parameters, as named by scipy.stats
+      batch_shape (tuple): () if every parameter is a number,
+        otherwise (k, ), where k is the number of settings
+    """
+
+    def __new__(cls, *args, **kwargs):
+        # If any parameter is random, return a probability space
+        # for the hierarchical model instead.
+        if any(isinstance(arg, RV) for arg in
+               list(args) + list(kwargs.values())):
+            return HierarchicalDistribution(cls, *args, **kwargs)
+        return super().__new__(cls)
+
     def __init__(self, params, scipy, discrete=True):
         self.params = params
+        self.batch_shape = np.broadcast(*params.values()).shape
 
         self.discrete = discrete
 
@@ -20,6 +67,8 @@ class Distribution(ProbabilitySpace):
 
         self.cdf = lambda x: scipy.cdf(x, **self.params)
         self.quantile = lambda x: scipy.ppf(x, **self.params)
+        self.sf = lambda x: scipy.sf(x, **self.params)
+        self.isf = lambda x: scipy.isf(x, **self.params)
 
         self.median = lambda: scipy.median(**self.params)
         self.mean = lambda: scipy.mean(**self.params)
@@ -32,24 +81,77 @@ class Distribution(ProbabilitySpace):
             scipy.ppf(0.999, **self.params)
             )
 
+    def _sample(self, size=None):
+        return self.sim_func(**self.params, size=size)
+
+    def _make_output(self, value):
+        if self.batch_shape:
+            return Vector(value)
+        return Scalar(value)
+
     def draw(self):
-        return Scalar(self.sim_func(**self.params))
+        return self._make_output(self._sample())
+
+    def draws(self, n):
+        """Draw n values from the distribution with one vectorized call.
+
+        Args:
+          n (int): How many draws to make.
+
+        Returns:
+          list: The n values.
+        """
+        return [self._make_output(value)
+                for value in self._sample((n, ) + self.batch_shape)]
 
     # Override the inherited __pow__ function to take advantage
     # of vectorized simulations.
     def __pow__(self, exponent):
         if exponent == float("inf"):
             def draw():
-                def _func(_):
-                    return self.sim_func(**self.params)
+                # (missing ranges of the sequence are drawn in one call)
+                @vectorized
+                def _func(n):
+                    if np.ndim(n) and not self.batch_shape:
+                        return self._sample(size=len(n))
+                    elif np.ndim(n):
+                        return [self.draw() for _ in n]
+                    return self.draw()
                 return InfiniteVector(_func)
+        elif self.batch_shape:
+            def draw():
+                return Vector(self.draws(exponent))
         else:
             def draw():
-                return Vector(self.sim_func(**self.params, size=exponent))
+                return Vector(self._sample(size=exponent))
         return ProbabilitySpace(draw)
 
+    def truncate(self, lower, upper):
+        """Restrict the distribution to an interval.
+
+        Args:
+          lower (float): lower endpoint of the interval
+          upper (float): upper endpoint of the interval
+
+        Returns:
+          TruncatedDistribution: the conditional distribution,
+            given that a draw falls between lower and upper.
+        """
+        if (self.discrete or not hasattr(self, "cdf") or
+            getattr(self, "batch_shape", ())):
+            raise Exception(
+                "Only continuous distributions with a cdf "
+                "and scalar parameters can be truncated.")
+        return TruncatedDistribution(self, lower, upper)
+
     def plot(self, type=None, alpha=None, xlim=None, **kwargs):
 
+        if self.batch_shape:
+            raise Exception(
+                "Plotting is not currently available for "
+                "distributions with array-valued parameters."
+            )
+
         new_fig = len(plt.gcf().axes) == 0
 
         # use limits if specified
@@ -81,6 +183,185 @@ class Distribution(ProbabilitySpace):
         plt.xlim(xlower, xupper)
 
 
+class TruncatedDistribution(ProbabilitySpace):
+    """Defines a continuous distribution restricted to an interval.
+
+    Draws are made by inverse transform sampling: a uniform number
+    between F(lower) and F(upper) is passed through the quantile
+    function. Far in the right tail, the survival function is
+    inverted instead to avoid losing precision. Either way, the
+    cost does not depend on how unlikely the interval is.
+
+    Attributes:
+      distribution (Distribution): the distribution to truncate
+      lower (float): lower endpoint of the interval
+      upper (float): upper endpoint of the interval
+    """
+
+    def __init__(self, distribution, lower, upper):
+        self.distribution = distribution
+        self.lower = lower
+        self.upper = upper
+        # Use the survival function when the interval lies
+        # in the right half of the distribution.
+        self.use_sf = distribution.cdf(lower) > 0.5
+        if self.use_sf:
+            self.p_lower = distribution.sf(upper)
+            self.p_upper = distribution.sf(lower)
+        else:
+            self.p_lower = distribution.cdf(lower)
+            self.p_upper = distribution.cdf(upper)
+        if not self.p_upper > self.p_lower:
+            raise Exception("Cannot condition on an event "
+                            "with probability 0.")
+
+    def _sample(self, size):
+        u = np.random.uniform(self.p_lower, self.p_upper, size=size)
+        if self.use_sf:
+            x = self.distribution.isf(u)
+        else:
+            x = self.distribution.quantile(u)
+        return np.clip(x, self.lower, self.upper)
+
+    def draw(self):
+        return Scalar(self._sample(None))
+
+    def draws(self, n):
+        return [Scalar(x) for x in self._sample(n)]
+
+
+class HierarchicalDistribution(ProbabilitySpace):
+    """Defines a distribution whose parameters are random variables.
+
+    A draw is a joint draw: an outcome of the probability space that
+    the random parameters are defined on (the parent space), followed
+    by a value from the distribution with the parameters evaluated at
+    that outcome. Each value keeps its parent outcome, so RVs defined
+    on the parent space can be combined with RVs defined here, e.g.,
+    M & X, X - M, or X | (M > .5).
+
+    To simulate n draws, the n parent outcomes are drawn first (as a
+    batch), and then the n values are sampled with one vectorized
+    call, each using its own parameters. HierarchicalDistributions
+    are typically produced by passing RVs as parameters to a named
+    distribution.
+
+    Attributes:
+      distribution (type): the named distribution, e.g., Normal
+      args (tuple): positional parameters (numbers or RVs)
+      kwargs (dict): keyword parameters (numbers or RVs)
+      parent_space (ProbabilitySpace): the probability space
+        that the random parameters are defined on
+      size (int): if not None, the number of values to draw (as a
+        Vector) for each parent outcome
+
+    Examples:
+      M = RV(Uniform(0, 1))
+      X = RV(Normal(mean=M, sd=1))
+      # X1 and X2 are independent given M
+      X1, X2 = RV(Normal(mean=M, sd=1) ** 2)
+    """
+
+    def __init__(self, distribution, *args, **kwargs):
+        self.distribution = distribution
+        self.args = args
+        self.kwargs = kwargs
+        self.size = None
+        params = list(args) + list(kwargs.values())
+        if any(np.ndim(param) for param in params
+               if not isinstance(param, RV)):
+            raise Exception(
+                "Only scalar parameters can be combined with "
+                "random parameters.")
+        self.rvs = [param for param in params if isinstance(param, RV)]
+        # All of the random parameters must be defined on the same
+        # probability space (or on spaces that extend each other).
+        self.parent_space = self.rvs[0].prob_space
+        for rv in self.rvs[1:]:
+            self.parent_space = _common_space(self.parent_space,
+                                              rv.prob_space)[0]
+        self.param_funcs = {
+            id(rv): _compose(rv.func,
+                             self.parent_space._projection(rv.prob_space))
+            for rv in self.rvs}
+
+    def _projection(self, other):
+        if self == other:
+            return _identity
+        projection = self.parent_space._projection(other)
+        if projection is None:
+            return None
+        return lambda outcome: projection(outcome.parent)
+
+    def _get_params(self, outcomes):
+        # The parameters for each of the parent outcomes.
+        values = {key: np.asarray([func(outcome) for outcome in outcomes])
+                  for key, func in self.param_funcs.items()}
+
+        def _get(param):
+            if isinstance(param, RV):
+                return values[id(param)]
+            return param
+
+        args = [_get(arg) for arg in self.args]
+        kwargs = {key: _get(value) for key, value in self.kwargs.items()}
+        return args, kwargs
+
+    def draws(self, n):
+        """Draw n values, each with its own realization of the parameters.
+
+        Args:
+          n (int): How many draws to make.
+
+        Returns:
+          list: The n values.
+        """
+        outcomes = self.parent_space.draws(n)
+        if not outcomes:
+            return []
+        args, kwargs = self._get_params(outcomes)
+        if self.size == float("inf"):
+            # (an infinite sequence of values is drawn from the
+            #  distribution with the parameters of each outcome)
+            def _at(param, i):
+                return param[i] if np.ndim(param) else param
+            values = []
+            for i in range(n):
+                dist = self.distribution(
+                    *[_at(arg, i) for arg in args],
+                    **{key: _at(value, i) for key, value in kwargs.items()})
+                values.append((dist ** self.size).draw())
+        else:
+            size = 1 if self.size is None else self.size
+            # (each parameter is repeated for each of the size values
+            #  drawn for the same parent outcome)
+            args = [np.repeat(arg, size) if np.ndim(arg) else arg
+                    for arg in args]
+            kwargs = {key: np.repeat(value, size) if np.ndim(value)
+                      else value for key, value in kwargs.items()}
+            sample = self.distribution(*args, **kwargs)._sample(
+                size=(n * size, ))
+            if self.size is None:
+                values = [Scalar(value) for value in sample]
+            else:
+                values = [Vector(row) for row in sample.reshape(n, size)]
+        for value, outcome in zip(values, outcomes):
+            value.parent = outcome
+        return values
+
+    def draw(self):
+        return self.draws(1)[0]
+
+    # Repeated draws share the parent outcome, so that they are
+    # conditionally independent given the random parameters.
+    def __pow__(self, exponent):
+        if self.size is not None:
+            return super().__pow__(exponent)
+        dist = copy.copy(self)
+        dist.size = exponent
+        return dist
+
+
 ## Discrete Distributions
 
 class Bernoulli(Distribution):
@@ -93,7 +374,8 @@ class Bernoulli(Distribution):
     """
 
     def __init__(self, p):
-        if 0 <= p <= 1:
+        p = _as_param(p)
+        if np.all((0 <= p) & (p <= 1)):
             self.p = p
         else:
             raise Exception("p must be between 0 and 1")
@@ -116,8 +398,9 @@ class Binomial(Distribution):
     """
 
     def __init__(self, n, p):
+        n, p = _as_param(n), _as_param(p)
 
-        if n >= 0 and isinstance(n, numbers.Integral):
+        if np.all(n >= 0) and _is_integer(n):
             self.n = n
         #elif n == 0:
             #raise NotImplementedError
@@ -125,7 +408,7 @@ class Binomial(Distribution):
         else:
             raise Exception("n must be a non-negative integer")
 
-        if 0 <= p <= 1:
+        if np.all((0 <= p) & (p <= 1)):
             self.p = p
         else:
             raise Exception("p must be between 0 and 1")
@@ -152,18 +435,19 @@ class Hypergeometric(Distribution):
     """
 
     def __init__(self, n, N0, N1):
+        n, N0, N1 = _as_param(n), _as_param(N0), _as_param(N1)
 
-        if n > 0 and isinstance(n, numbers.Integral):
+        if np.all(n > 0) and _is_integer(n):
             self.n = n
         else:
             raise Exception("n must be a positive integer")
 
-        if N0 >= 0 and isinstance(N0, numbers.Integral):
+        if np.all(N0 >= 0) and _is_integer(N0):
             self.N0 = N0
         else:
             raise Exception("N0 must be a non-negative integer")
 
-        if N1 >= 0 and isinstance(N1, numbers.Integral):
+        if np.all(N1 >= 0) and _is_integer(N1):
             self.N1 = N1
         else:
             raise Exception("N1 must be a non-negative integer")
@@ -174,7 +458,7 @@ class Hypergeometric(Distribution):
             "N" : n
             }
 
-        if N0 + N1 < n:
+        if np.any(N0 + N1 < n):
             raise Exception("N0 + N1 cannot be less than the sample size n")
 
         super().__init__(params, stats.hypergeom, True)
@@ -193,8 +477,9 @@ class Geometric(Distribution):
     """
 
     def __init__(self, p):
+        p = _as_param(p)
 
-        if 0 < p < 1:
+        if np.all((0 < p) & (p < 1)):
             self.p = p
         else:
             raise Exception("p must be between 0 and 1")
@@ -219,13 +504,14 @@ class NegativeBinomial(Distribution):
     """
 
     def __init__(self, r, p):
+        r, p = _as_param(r), _as_param(p)
 
-        if 0 < r and isinstance(r, numbers.Integral):
+        if np.all(0 < r) and _is_integer(r):
             self.r = r
         else:
             raise Exception("r must be a positive integer")
 
-        if 0 < p <= 1:
+        if np.all((0 < p) & (p <= 1)):
             self.p = p
         else:
             raise Exception("p must be between 0 and 1")
@@ -238,13 +524,11 @@ class NegativeBinomial(Distribution):
         super().__init__(params, stats.nbinom, True)
         self.xlim = (r, self.xlim[1]) # Negative Binomial distributions are not defined for x < r
 
-    def draw(self):
-        """A function that takes no arguments and
-            returns a single draw from the Negative Binomial distribution."""
-
+    def _sample(self, size=None):
         # Numpy's negative binomial returns numbers in [0, inf),
         # but we want numbers in [r, inf).
-        return self.r + np.random.negative_binomial(n=self.r, p=self.p)
+        return self.r + np.random.negative_binomial(n=self.r, p=self.p,
+                                                    size=size)
 
 
 class Pascal(Distribution):
@@ -260,13 +544,14 @@ class Pascal(Distribution):
     """
 
     def __init__(self, r, p):
+        r, p = _as_param(r), _as_param(p)
 
-        if 0 < r and isinstance(r, numbers.Integral):
+        if np.all(0 < r) and _is_integer(r):
             self.r = r
         else:
             raise Exception("r must be a positive integer")
 
-        if 0 < p <= 1:
+        if np.all((0 < p) & (p <= 1)):
             self.p = p
         else:
             raise Exception("p must be between 0 and 1")
@@ -287,8 +572,9 @@ class Poisson(Distribution):
     """
 
     def __init__(self, lam):
+        lam = _as_param(lam)
 
-        if 0 < lam:
+        if np.all(0 < lam):
             self.lam = lam
         else:
             raise Exception("Lambda (lam) must be greater than 0")
@@ -309,6 +595,7 @@ class DiscreteUniform(Distribution):
     """
 
     def __init__(self, a=0, b=1):
+        a, b = _as_param(a), _as_param(b)
         self.a = a
         self.b = b + 1
 
@@ -317,7 +604,7 @@ class DiscreteUniform(Distribution):
             "high" : self.b
             }
 
-        if a >= b:
+        if np.any(a >= b):
             raise Exception("b cannot be less than or equal to a")
 
         super().__init__(params, stats.randint, True)
@@ -335,6 +622,7 @@ class Uniform(Distribution):
     """
 
     def __init__(self, a=0.0, b=1.0):
+        a, b = _as_param(a), _as_param(b)
         self.a = a
         self.b = b
 
@@ -343,7 +631,7 @@ class Uniform(Distribution):
             "scale" : b - a
             }
 
-        if a > b:
+        if np.any(a > b):
             raise Exception("b cannot be less than a")
 
         super().__init__(params, stats.uniform, False)
@@ -363,22 +651,23 @@ class Normal(Distribution):
     #TODO edit docstring for Normal Distribution
 
     def __init__(self, mean=0.0, sd=1.0, var=None):
+        mean, sd, var = _as_param(mean), _as_param(sd), _as_param(var)
 
         #Note: cleaner way to implement this
 
         if var is None:
-            if sd > 0:
+            if np.all(sd > 0):
                 self.scale = sd
-            elif sd == 0:
+            elif np.all(sd >= 0):
                 raise NotImplementedError
                 #TODO
             else:
                 raise Exception("sd cannot be less than 0")
 
         else:
-            if var > 0:
+            if np.all(var > 0):
                 self.scale = np.sqrt(var)
-            elif var == 0:
+            elif np.all(var >= 0):
                 raise NotImplementedError
                 #TODO
             else:
@@ -404,15 +693,16 @@ class Exponential(Distribution):
     """
 
     def __init__(self, rate=1.0, scale=None):
+        rate, scale = _as_param(rate), _as_param(scale)
 
         if scale is None:
-            if rate > 0:
+            if np.all(rate > 0):
                 self.rate = rate
                 self.scale = scale
             else:
                 raise Exception("rate must be positive")
         else:
-            if scale > 0:
+            if np.all(scale > 0):
                 self.scale = scale
             else:
                 raise Exception("scale must be positive")
@@ -439,20 +729,21 @@ class Gamma(Distribution):
     """
 
     def __init__(self, shape, rate=1.0, scale=None):
+        shape, rate, scale = _as_param(shape), _as_param(rate), _as_param(scale)
 
-        if 0 < shape:
+        if np.all(0 < shape):
             self.shape = shape
         else:
             raise Exception("shape parameter must be positive")
 
         if scale is None:
-            if rate > 0:
+            if np.all(rate > 0):
                 self.rate = rate
                 self.scale = scale
             else:
                 raise Exception("rate must be positive")
         else:
-            if scale > 0:
+            if np.all(scale > 0):
                 self.scale = scale
             else:
                 raise Exception("scale must be positive")
@@ -474,13 +765,14 @@ class Beta(Distribution):
     """
 
     def __init__(self, a, b):
+        a, b = _as_param(a), _as_param(b)
 
-        if 0 < a:
+        if np.all(0 < a):
             self.a = a
         else:
             raise Exception("a must be positive")
 
-        if 0 < b:
+        if np.all(0 < b):
             self.b = b
         else:
             raise Exception("b must be positive")
@@ -501,7 +793,8 @@ class StudentT(Distribution):
     """
 
     def __init__(self, df):
-        if df > 0:
+        df = _as_param(df)
+        if np.all(df > 0):
             self.df = df
         else:
             raise Exception("df must be greater than 0")
@@ -510,7 +803,7 @@ class StudentT(Distribution):
             "df" : df
             }
         super().__init__(params, stats.t, False)
-        if df == 1:
+        if np.ndim(df) == 0 and df == 1:
             self.mean = lambda: float('nan')
             self.sd = lambda: float('nan')
             self.var = lambda: float('nan')
@@ -524,7 +817,8 @@ class ChiSquare(Distribution):
     """
 
     def __init__(self, df):
-        if df > 0 and isinstance(df, numbers.Integral):
+        df = _as_param(df)
+        if np.all(df > 0) and _is_integer(df):
             self.df = df
         else:
             raise Exception("df must be a positive integer")
@@ -545,13 +839,14 @@ class F(Distribution):
     """
 
     def __init__(self, dfN, dfD):
+        dfN, dfD = _as_param(dfN), _as_param(dfD)
 
-        if dfN > 0:
+        if np.all(dfN > 0):
             self.dfN = dfN
         else:
             raise Exception("dfN must be greater than 0")
 
-        if dfD > 0:
+        if np.all(dfD > 0):
             self.dfD = dfD
         else:
             raise Exception("dfD must be greater than 0")
@@ -572,6 +867,7 @@ class Cauchy(Distribution):
     """
 
     def __init__(self, loc=0, scale=1):
+        loc, scale = _as_param(loc), _as_param(scale)
         self.loc = loc
         self.scale = scale
 
@@ -582,8 +878,8 @@ class Cauchy(Distribution):
 
         super().__init__(params, stats.cauchy, False)
 
-    def draw(self):
-        return self.loc + (self.scale * np.random.standard_cauchy())
+    def _sample(self, size=None):
+        return self.loc + (self.scale * np.random.standard_cauchy(size=size))
 
 
 class LogNormal(Distribution):
@@ -598,10 +894,11 @@ class LogNormal(Distribution):
     """
 
     def __init__(self, mu=0.0, sigma=1.0):
+        mu, sigma = _as_param(mu), _as_param(sigma)
 
         self.norm_mean = mu
 
-        if sigma > 0:
+        if np.all(sigma > 0):
             self.s = sigma
             self.norm_sd = sigma
         else:
@@ -625,13 +922,14 @@ class Pareto(Distribution):
     """
 
     def __init__(self, b=1.0, scale=1.0):
+        b, scale = _as_param(b), _as_param(scale)
 
-        if b > 0:
+        if np.all(b > 0):
             self.b = b
         else:
             raise Exception("b must be greater than 0")
 
-        if scale > 0:
+        if np.all(scale > 0):
             self.scale = scale
         else:
             raise Exception("scale must be greater than 0")
@@ -643,13 +941,10 @@ class Pareto(Distribution):
         super().__init__(params, stats.pareto, False)
         self.xlim = (scale, self.xlim[1]) # Pareto distributions are not defined for x < scale
 
-    def draw(self):
-        """A function that takes no arguments and
-           returns a single draw from the Pareto distribution."""
-        
+    def _sample(self, size=None):
         # Numpy's Pareto is Lomax distribution, or Type II Pareto
         # but we want the more standard parametrization
-        return self.scale * (1 + np.random.pareto(self.b))
+        return self.scale * (1 + np.random.pareto(self.b, size=size))
 
 
 # class Weibull(Distribution):
@@ -717,6 +1012,10 @@ class MultivariateNormal(Distribution):
 
         return Vector(np.random.multivariate_normal(self.mean, self.cov))
 
+    def draws(self, n):
+        return [Vector(x) for x in
+                np.random.multivariate_normal(self.mean, self.cov, size=n)]
+
     def __pow__(self, exponent):
         if exponent == float("inf"):
             def draw():
@@ -817,6 +1116,10 @@ class Multinomial(Distribution):
 
         return Vector(np.random.multinomial(self.n, self.p))
 
+    def draws(self, n):
+        return [Vector(x) for x in
+                np.random.multinomial(self.n, self.p, size=n)]
+
     def __pow__(self, exponent):
         if exponent == float("inf"):
             def draw():
@@ -1,90 +1,712 @@
+import copy
+
 import numpy as np
+from scipy import linalg
 
 from .index_sets import (
     DiscreteTimeSequence,
     Reals
 )
+from .kernels import Brownian, Kernel, Stationary, broadcast_call
 from .probability_space import ProbabilitySpace
 from .result import (
+    ArrayBuffer,
     DiscreteTimeFunction,
-    ContinuousTimeFunction
+    ContinuousTimeFunction,
+    is_numeric_vector
 )
 from .random_variables import RV
+from .results import RVResults
 from .random_processes import RandomProcess
 
 MACHINE_EPS = 1e-12
 
 
-def get_gaussian_process_result(mean_func, cov_func, index_set=Reals()):
+class GaussianGrid:
+    """A Gaussian process on a grid of times, factored once.
+
+    The covariance matrix of the values at the times is computed and
+    factored once, and then shared by every path sampled on the grid.
+
+    Args:
+      mean_func: mean function (function of one argument)
+      cov_func: (auto)covariance function (function of two arguments)
+      times (list): the times in the grid
+
+    Attributes:
+      times (np.ndarray): the times in the grid
+      means (np.ndarray): the mean at each of the times
+      chol (np.ndarray): the (Fortran-ordered) lower Cholesky factor
+        of the covariance matrix
+      positions (dict): the index of each time in the grid
+    """
+
+    def __init__(self, mean_func, cov_func, times):
+        self.times = np.asarray(times, dtype=float)
+        self.means = broadcast_call(mean_func, self.times)
+        cov = _cov_matrix(cov_func, self.times, self.times)
+        cov[np.diag_indices_from(cov)] += MACHINE_EPS
+        self.chol = np.asfortranarray(linalg.cholesky(cov, lower=True))
+        self.positions = {t: i for i, t in enumerate(self.times.tolist())}
+
+    def __len__(self):
+        return len(self.times)
+
+    def position(self, t):
+        """The index of time t in the grid (or None if it is not in it)."""
+        return self.positions.get(t)
+
+    def sample(self, n):
+        """Sample the values of n paths on the grid.
+
+        Returns:
+          tuple: an n x m array of values, and the n x m array of
+            whitened values (i.i.d. standard normals) they came from
+        """
+        whitened = np.random.standard_normal((n, len(self.times)))
+        return self.means + whitened @ self.chol.T, whitened
+
+
+class CirculantGrid(GaussianGrid):
+    """A stationary Gaussian process on a regular grid, sampled by FFT.
+
+    The covariance matrix of m equally spaced times is a Toeplitz
+    matrix, which is embedded in a circulant matrix of size M >= 2(m-1).
+    A circulant matrix is diagonalized by the discrete Fourier
+    transform, so if its eigenvalues are all non-negative, each FFT of
+    size M samples two independent paths on the grid exactly, in
+    O(M log M) time.
+
+    The Cholesky factor of the covariance matrix is only computed
+    if a path has to be conditioned on its values on the grid (to
+    evaluate it at a time off the grid). That takes O(m^2) memory and
+    O(m^3) time, so it is only done for grids of at most max_chol_size
+    times.
+
+    Args:
+      mean_func: mean function (function of one argument)
+      cov_func (Stationary): stationary covariance function
+      times (np.ndarray): the (sorted, equally spaced) times in the grid
+      eigenvalues (np.ndarray): the eigenvalues of the circulant
+        embedding (see _circulant_eigenvalues)
+
+    Attributes:
+      times (np.ndarray): the times in the grid
+      means (np.ndarray): the mean at each of the times
+      eigenvalues (np.ndarray): the eigenvalues of the circulant embedding
+    """
+
+    # the number of (complex) values to transform at once
+    block_size = 2 ** 22
+    # the most times for which the dense Cholesky factor is computed
+    max_chol_size = 2 ** 12
+
+    def __init__(self, mean_func, cov_func, times, eigenvalues):
+        self.times = times
+        self.means = broadcast_call(mean_func, self.times)
+        self.cov_func = cov_func
+        self.eigenvalues = eigenvalues
+        self.step = times[1] - times[0] if len(times) > 1 else 1
+        self._chol = None
+
+    def position(self, t):
+        """The index of time t in the grid (or None if it is not in it)."""
+        i = int(round((t - self.times[0]) / self.step))
+        if 0 <= i < len(self.times) and self.times[i] == t:
+            return i
+        return None
+
+    @property
+    def chol(self):
+        if self._chol is None:
+            if len(self.times) > self.max_chol_size:
+                raise Exception(
+                    "Paths sampled on a grid of more than %d times "
+                    "cannot be evaluated at times off the grid. Include "
+                    "those times in the grid instead." % self.max_chol_size
+                )
+            cov = linalg.toeplitz(broadcast_call(
+                self.cov_func.func, self.times - self.times[0]))
+            cov[np.diag_indices_from(cov)] += MACHINE_EPS
+            self._chol = np.asfortranarray(
+                linalg.cholesky(cov, lower=True))
+        return self._chol
+
+    def sample(self, n):
+        """Sample the values of n paths on the grid.
+
+        Returns:
+          tuple: an n x m array of values, and None (the whitened
+            values are only computed if they are needed)
+        """
+        m, size = len(self.times), len(self.eigenvalues)
+        scale = np.sqrt(self.eigenvalues / size)
+        values = np.empty((n, m))
+        # the real and imaginary parts of each transform are two paths
+        rows = max(self.block_size // size, 1)
+        for start in range(0, n, 2 * rows):
+            k = min(rows, (n - start + 1) // 2)
+            z = np.empty((k, size), dtype=complex)
+            z.real = np.random.standard_normal((k, size))
+            z.imag = np.random.standard_normal((k, size))
+            z *= scale
+            y = np.fft.fft(z, axis=1)[:, :m]
+            stop = min(start + 2 * k, n)
+            values[start:stop:2] = y.real
+            values[start + 1:stop:2] = y.imag[:(stop - start) // 2]
+        values += self.means
+        return values, None
+
+
+def _circulant_eigenvalues(cov_func, m, step, doublings=2):
+    # The eigenvalues of the smallest circulant embedding (of size a
+    # power of 2, at most 2 ** doublings times the minimum size) of the
+    # covariance matrix of m times that are step apart, or None if none
+    # of the embeddings are positive semidefinite.
+    size = 1
+    while size < 2 * (m - 1):
+        size *= 2
+    for _ in range(doublings + 1):
+        # the first row of the circulant matrix is symmetric about size/2
+        half = broadcast_call(cov_func.func,
+                              step * np.arange(size // 2 + 1))
+        row = np.concatenate([half, half[-2:0:-1]])[:size]
+        eigenvalues = np.fft.fft(row).real
+        if eigenvalues.min() >= -1e-10 * max(eigenvalues.max(), 0):
+            return np.maximum(eigenvalues, 0)
+        size *= 2
+    return None
+
+
+def make_grid(mean_func, cov_func, times):
+    """Factor the covariance of a Gaussian process on a grid of times.
+
+    If the covariance function is Stationary and the times are equally
+    spaced, the grid is sampled by circulant embedding (CirculantGrid).
+    Otherwise (or if the embedding is not positive semidefinite), the
+    covariance matrix is factored densely (GaussianGrid).
+    """
+    times = np.asarray(times, dtype=float)
+    if isinstance(cov_func, Stationary) and len(times) > 1:
+        steps = np.diff(times)
+        if steps[0] > 0 and np.allclose(steps, steps[0], rtol=1e-9,
+                                        atol=0):
+            eigenvalues = _circulant_eigenvalues(cov_func, len(times),
+                                                 steps[0])
+            if eigenvalues is not None:
+                return CirculantGrid(mean_func, cov_func, times,
+                                     eigenvalues)
+    return GaussianGrid(mean_func, cov_func, times)
+
+
+def _cov_matrix(cov_func, s, t):
+    # The matrix of covariances between the times s and the times t
+    # (in one call, if cov_func works on arrays).
+    s, t = np.asarray(s, dtype=float), np.asarray(t, dtype=float)
+    if isinstance(cov_func, Kernel):
+        return cov_func.matrix(s, t)
+    return broadcast_call(cov_func, s[:, np.newaxis], t[np.newaxis, :])
+
+
+class LowRankFeatures:
+    """A low-rank approximation to the covariance of a Gaussian process.
+
+    The covariance function is approximated by cov(s, t) ~ phi(s) . phi(t),
+    for a vector phi(t) of r features, so a path is approximated by
+    mean(t) + phi(t) . z, where z is a vector of r i.i.d. standard
+    normals. Sampling n paths at m times then costs O(n m r), instead
+    of the O(m^3) of factoring the exact covariance matrix.
+
+    Subclasses define features(times), which returns the m x r matrix
+    of features of the given times. If the features are a fixed
+    linear transformation of cheaper basis functions, subclasses can
+    also define basis(times) and coefficients(weights) so that
+    phi(t) . z = basis(t) . coefficients(z).
+    """
+
+    # the number of times to compute features for at once
+    block_size = 2 ** 14
+
+    def basis(self, times):
+        return self.features(times)
+
+    def coefficients(self, weights):
+        return weights
+
+    def sample(self, mean_func, times, weights):
+        """The values at the given times of the paths with the given
+        weights (an n x r array), as an n x m array."""
+        times = np.asarray(times, dtype=float)
+        coefficients = self.coefficients(weights)
+        values = np.empty((len(weights), len(times)))
+        for start in range(0, len(times), self.block_size):
+            block = times[start:start + self.block_size]
+            values[:, start:start + len(block)] = (
+                broadcast_call(mean_func, block) +
+                coefficients @ self.basis(block).T)
+        return values
+
+    def error(self, times, size=1000):
+        """The relative (Frobenius norm) error of the approximate
+        covariance matrix of the times (or of at most size of them,
+        equally spaced in sorted order)."""
+        times = np.sort(np.asarray(times, dtype=float))
+        times = times[np.linspace(0, len(times) - 1,
+                                  min(len(times), size)).astype(int)]
+        cov = _cov_matrix(self.cov_func, times, times)
+        features = self.features(times)
+        return (np.linalg.norm(cov - features @ features.T) /
+                np.linalg.norm(cov))
+
+
+class FourierFeatures(LowRankFeatures):
+    """Random Fourier features for a stationary covariance function.
+
+    By Bochner's theorem, cov(s, t) = k(0) E[cos(W (t - s))] for a random
+    frequency W, so cov(s, t) is approximated by averaging over r
+    sampled frequencies w_j and phases b_j:
+
+        phi_j(t) = sqrt(2 k(0) / r) cos(w_j t + b_j).
+
+    The error is O(1 / sqrt(r)), no matter how many times there are.
+
+    Args:
+      cov_func (Stationary): a stationary kernel with a spectral_sample
+        method (e.g., RBF, Matern32)
+      rank (int): the number of features r
+    """
+
+    def __init__(self, cov_func, rank):
+        if not isinstance(cov_func, Stationary):
+            raise Exception(
+                "Fourier features are only defined for Stationary "
+                "covariance functions."
+            )
+        if cov_func.spectral_sample is None:
+            raise Exception(
+                "Fourier features need the spectral measure of the "
+                "covariance function, which is not known for %s. Try "
+                "approximation=\"nystrom\" instead." %
+                type(cov_func).__name__
+            )
+        self.cov_func = cov_func
+        self.rank = rank
+        self.frequencies = cov_func.spectral_sample(rank)
+        self.phases = np.random.uniform(0, 2 * np.pi, rank)
+        self.scale = np.sqrt(2 * cov_func.func(0) / rank)
+
+    def features(self, times):
+        times = np.asarray(times, dtype=float)
+        return self.scale * np.cos(np.multiply.outer(times, self.frequencies) +
+                                   self.phases)
+
+
+class NystromFeatures(LowRankFeatures):
+    """Nystrom features for any covariance function.
+
+    The process is approximated by its conditional mean given its values
+    at r inducing times u, which has covariance K(s, u) K(u, u)^{-1} K(u, t).
+    With the Cholesky factor K(u, u) = L L^T, the features are
+
+        phi(t) = L^{-1} K(u, t),
+
+    but paths are evaluated as K(t, u) . L^{-T} z, so that each time
+    only costs O(r) once L^{-T} z is computed.
+
+    Args:
+      cov_func: (auto)covariance function (function of two arguments)
+      inducing_times (list): the r inducing times
+    """
+
+    def __init__(self, cov_func, inducing_times):
+        self.cov_func = cov_func
+        self.inducing_times = np.asarray(inducing_times, dtype=float)
+        self.rank = len(self.inducing_times)
+        cov = _cov_matrix(cov_func, self.inducing_times, self.inducing_times)
+        # (the jitter is relative, since inducing times that are close
+        #  together make the matrix nearly singular)
+        cov[np.diag_indices_from(cov)] += 1e-10 * np.trace(cov) / self.rank
+        self.chol = linalg.cholesky(cov, lower=True)
+
+    def features(self, times):
+        return linalg.solve_triangular(self.chol, self.basis(times).T,
+                                       lower=True, check_finite=False).T
+
+    def basis(self, times):
+        return _cov_matrix(self.cov_func, times, self.inducing_times)
+
+    def coefficients(self, weights):
+        return linalg.solve_triangular(self.chol, weights.T, lower=True,
+                                       trans="T", check_finite=False).T
+
+
+class LowRankPath:
+    """Evaluates a path mean(t) + phi(t) . z of a low-rank approximation
+    to a Gaussian process (see LowRankFeatures).
+
+    Args:
+      mean_func: mean function (function of one argument)
+      factor (LowRankFeatures): the approximation
+      coefficients (np.ndarray): the coefficients of the path, for
+        the weights z (see LowRankFeatures.coefficients)
+    """
+
+    def __init__(self, mean_func, factor, coefficients):
+        self.mean_func = mean_func
+        self.factor = factor
+        self.coefficients = coefficients
+
+    def sample(self, t0):
+        return (self.mean_func(t0) +
+                self.factor.basis([t0])[0] @ self.coefficients)
+
+
+class GaussianConditioner:
+    """Samples a Gaussian process one time at a time, given the past.
+
+    The covariance matrix of the times sampled so far is kept as a
+    Cholesky factor L, along with the whitened values z = L^{-1}(x - mu).
+    Each new time extends L by one row, so the conditional mean and
+    variance cost one triangular solve, O(k^2) for the kth time,
+    instead of the O(k^3) of solving against the covariance matrix.
+
+    If the path was sampled on a GaussianGrid first, the factor of the
+    grid is shared with the other paths, and only the rows for the
+    times after the grid are stored for this path:
+
+        L = [[L_grid, 0], [cross, L_own]]
+
+    Args:
+      mean_func: mean function (function of one argument)
+      cov_func: (auto)covariance function (function of two arguments)
+      grid (GaussianGrid): the grid the path was sampled on, if any
+      grid_values (np.ndarray): the values of the path on the grid
+      grid_whitened (np.ndarray): the whitened values on the grid
+        (if not given, they are computed from grid_values when needed)
+
+    Attributes:
+      times (ArrayBuffer): the times sampled so far (after the grid)
+      values (ArrayBuffer): the value at each of the times
+    """
+
+    def __init__(self, mean_func, cov_func, grid=None,
+                 grid_values=None, grid_whitened=None):
+        self.mean_func = mean_func
+        self.cov_func = cov_func
+        self.grid = grid
+        self.grid_values = grid_values
+        self.grid_whitened = grid_whitened
+        self.times = ArrayBuffer(float)
+        self.positions = {}
+        self.values = ArrayBuffer(float)
+        self.whitened = ArrayBuffer(float)
+        # the rows of the factor under the grid, flattened
+        self.cross = ArrayBuffer(float)
+        # The factor is stored in the top left corner of an identity
+        # matrix, so that the whole (contiguous) buffer can be passed
+        # to the triangular solver without copying it.
+        self.chol = np.eye(16, order="F")
+
+    def __len__(self):
+        return len(self.times) + (len(self.grid) if self.grid else 0)
+
+    def _extend_chol(self, row):
+        # Append a row to the Cholesky factor (doubling its capacity
+        # whenever it is full).
+        k = len(row) - 1
+        if k == len(self.chol):
+            chol = np.eye(2 * k, order="F")
+            chol[:k, :k] = self.chol
+            self.chol = chol
+        self.chol[k, :k + 1] = row
+
+    def _cov_vector(self, times, t0):
+        return broadcast_call(self.cov_func, times, t0)
+
+    def sample(self, t0):
+        """Sample the value at time t0, given the values so far."""
+        # a time that has already been sampled keeps its value
+        if t0 in self.positions:
+            return self.values[self.positions[t0]]
+        if self.grid is not None:
+            i = self.grid.position(t0)
+            if i is not None:
+                return self.grid_values[i]
+
+        mean2 = self.mean_func(t0)
+        cov22 = self.cov_func(t0, t0)
+        # if variance is 0, just return the mean
+        if cov22 == 0:
+            return mean2
+
+        # calculate conditional mean and variance
+        # (first given the grid, then given the times after it)
+        k = len(self.times)
+        cov12 = self._cov_vector(self.times.array, t0)
+        cond_mean, cond_var = mean2, cov22
+        if self.grid is not None:
+            w_grid = linalg.solve_triangular(
+                self.grid.chol, self._cov_vector(self.grid.times, t0),
+                lower=True, check_finite=False)
+            if self.grid_whitened is None:
+                self.grid_whitened = linalg.solve_triangular(
+                    self.grid.chol, self.grid_values - self.grid.means,
+                    lower=True, check_finite=False)
+            cond_mean += w_grid @ self.grid_whitened
+            cond_var -= w_grid @ w_grid
+            cov12 -= self.cross.array.reshape(k, len(w_grid)) @ w_grid
+            self.cross.extend(w_grid)
+        rhs = np.zeros(len(self.chol))
+        rhs[:k] = cov12
+        w = linalg.solve_triangular(self.chol, rhs, lower=True,
+                                    check_finite=False)[:k]
+        cond_mean += w @ self.whitened.array
+        cond_var = max(cond_var - w @ w, 0)
+
+        # simulate normal with given mean and variance
+        noise = np.random.standard_normal()
+        value = cond_mean + np.sqrt(cond_var) * noise
+
+        # update the Cholesky factor and the whitened values
+        # (adding MACHINE_EPS to the variance, so that the factor
+        #  stays invertible even if the value is already determined)
+        diagonal = np.sqrt(cond_var + MACHINE_EPS)
+        self._extend_chol(np.append(w, diagonal))
+        self.whitened.append(np.sqrt(cond_var) * noise / diagonal)
+        self.positions[t0] = k
+        self.times.append(t0)
+        self.values.append(value)
+        return value
+
+
+class GaussianPosterior(Kernel):
+    """The posterior of a Gaussian process, given noisy observations.
+
+    Given observations y_i = X(t_i) + e_i, with independent N(0, noise_i^2)
+    errors e_i, the posterior of X is a Gaussian process with
+
+        mean(t) = mu(t) + v(t) . w,
+        cov(s, t) = k(s, t) - v(s) . v(t),
+
+    where L L^T = K + diag(noise^2) is the Cholesky factor of the
+    covariance matrix of the observations, v(t) = L^{-1} k(t_obs, t),
+    and w = L^{-1} (y - mu(t_obs)). L and w are computed once, so
+    each time only costs one triangular solve.
+
+    The posterior is itself a Kernel (its covariance function), whose
+    matrix method only computes v(t) once for each of the times.
+
+    Args:
+      mean_func: prior mean function (function of one argument)
+      cov_func: prior covariance function (function of two arguments)
+      times (list): the times of the observations
+      values (list): the observed values
+      noise: the standard deviation of the observation errors (a
+        number, or one number for each observation)
+
+    Attributes:
+      times (np.ndarray): the times of the observations
+      values (np.ndarray): the observed values
+      noise (np.ndarray): the standard deviation of each of the errors
+      chol (np.ndarray): the lower Cholesky factor L
+      whitened (np.ndarray): the whitened residuals w
+    """
+
+    def __init__(self, mean_func, cov_func, times, values, noise=0):
+        self.mean_func = mean_func
+        self.cov_func = cov_func
+        self.times = np.zeros(0)
+        self.values = np.zeros(0)
+        self.noise = np.zeros(0)
+        self.chol = np.zeros((0, 0))
+        self.whitened = np.zeros(0)
+        self._extend(times, values, noise)
+
+    def _extend(self, times, values, noise):
+        # Add the observations to the factor, as a block of k new rows:
+        #   L = [[L_old, 0], [cross^T, L_new]]
+        # which costs O(n^2 k) for n old observations, instead of the
+        # O((n + k)^3) of factoring all of them again.
+        times = np.asarray(times, dtype=float).ravel()
+        values = np.asarray(values, dtype=float).ravel()
+        if len(times) != len(values):
+            raise Exception("There must be one value for each time.")
+        noise = np.broadcast_to(np.asarray(noise, dtype=float),
+                                times.shape)
+        if np.any(noise < 0):
+            raise Exception("noise cannot be negative.")
+        cross = self._whiten(times)
+        block = _cov_matrix(self.cov_func, times, times) - cross.T @ cross
+        block[np.diag_indices_from(block)] += noise ** 2 + MACHINE_EPS
+        chol = linalg.cholesky(block, lower=True)
+        residuals = (values - broadcast_call(self.mean_func, times) -
+                     cross.T @ self.whitened)
+        n, k = len(self.times), len(times)
+        self.chol = np.block([[self.chol, np.zeros((n, k))],
+                              [cross.T, chol]])
+        self.whitened = np.concatenate([
+            self.whitened,
+            linalg.solve_triangular(chol, residuals, lower=True)
+        ])
+        self.times = np.concatenate([self.times, times])
+        self.values = np.concatenate([self.values, values])
+        self.noise = np.concatenate([self.noise, noise])
+
+    def update(self, times, values, noise=0):
+        """The posterior given these observations as well.
+
+        The factor of the observations so far is reused (and not
+        modified), so this only costs O(n^2 k) for k new observations.
+
+        Returns:
+          GaussianPosterior: the updated posterior
+        """
+        posterior = copy.copy(self)
+        posterior._extend(times, values, noise)
+        return posterior
+
+    def _whiten(self, times):
+        # v(t) for each of the times, as the columns of a matrix
+        cross = _cov_matrix(self.cov_func, self.times, times)
+        if len(self.times) == 0:
+            return cross
+        return linalg.solve_triangular(self.chol, cross, lower=True,
+                                       check_finite=False)
+
+    def mean(self, t):
+        """The posterior mean at time t (or at an array of times)."""
+        times = np.asarray(t, dtype=float)
+        means = (broadcast_call(self.mean_func, times.ravel()) +
+                 self._whiten(times.ravel()).T @ self.whitened)
+        return means.reshape(times.shape)[()]
+
+    def cov(self, s, t):
+        """The posterior covariance of times s and t (or of broadcast
+        arrays of times)."""
+        s, t = np.broadcast_arrays(np.asarray(s, dtype=float),
+                                   np.asarray(t, dtype=float))
+        prior = broadcast_call(self.cov_func, s, t)
+        # (each distinct time is only whitened once)
+        s_times, s_index = np.unique(s, return_inverse=True)
+        t_times, t_index = np.unique(t, return_inverse=True)
+        reduction = np.einsum("ij,ij->j",
+                              self._whiten(s_times)[:, s_index.ravel()],
+                              self._whiten(t_times)[:, t_index.ravel()])
+        return (prior - reduction.reshape(s.shape))[()]
+
+    def __call__(self, s, t):
+        return self.cov(s, t)
+
+    def matrix(self, s, t=None):
+        """The matrix of posterior covariances between the times s and t.
+
+        Args:
+          s (array_like): the times for the rows
+          t (array_like): the times for the columns (by default, s)
+
+        Returns:
+          np.ndarray: a len(s) x len(t) matrix
+        """
+        s = np.asarray(s, dtype=float)
+        whitened_s = self._whiten(s)
+        if t is None or t is s:
+            t, whitened_t = s, whitened_s
+        else:
+            t = np.asarray(t, dtype=float)
+            whitened_t = self._whiten(t)
+        return _cov_matrix(self.cov_func, s, t) - whitened_s.T @ whitened_t
+
+    def predict(self, times):
+        """The posterior means and standard deviations at the times.
+
+        Returns:
+          tuple: an array of means and an array of standard deviations
+        """
+        times = np.asarray(times, dtype=float)
+        whitened = self._whiten(times)
+        means = (broadcast_call(self.mean_func, times) +
+                 whitened.T @ self.whitened)
+        variances = (broadcast_call(self.cov_func, times, times) -
+                     np.sum(whitened ** 2, axis=0))
+        return means, np.sqrt(np.maximum(variances, 0))
+
+
+class _GaussianProcessPath:
+    # A path of a Gaussian process. On the grid the path was sampled on
+    # (if any), its values are looked up in the (shared) array of grid
+    # values. Anywhere else, they are sampled given the values so far,
+    # by a conditioner that is only built the first time it is needed.
+
+    def _init_path(self, mean_func, cov_func, index_set, grid,
+                   grid_values, grid_whitened, conditioner):
+        self.mean_func = mean_func
+        self.cov_func = cov_func
+        self.grid = grid
+        self.grid_values = grid_values
+        self.grid_whitened = grid_whitened
+        self._conditioner = conditioner
+
+    @property
+    def conditioner(self):
+        if self._conditioner is None:
+            self._conditioner = GaussianConditioner(
+                self.mean_func, self.cov_func, self.grid,
+                self.grid_values, self.grid_whitened)
+        return self._conditioner
+
+    def _sample(self, t0):
+        # Check that t0 is in the index set
+        if t0 not in self.index_set:
+            raise KeyError(
+                "Gaussian process is not defined at time %.2f." % t0
+            )
+        if self.grid is not None:
+            i = self.grid.position(t0)
+            if i is not None:
+                return self.grid_values[i]
+        return self.conditioner.sample(t0)
+
+
+class DiscreteGaussianProcessResult(_GaussianProcessPath,
+                                    DiscreteTimeFunction):
+
+    def __init__(self, mean_func, cov_func, index_set, grid=None,
+                 grid_values=None, grid_whitened=None, conditioner=None):
+        self._init_path(mean_func, cov_func, index_set, grid,
+                        grid_values, grid_whitened, conditioner)
+        # (the function is of an index n, at time n / fs)
+        DiscreteTimeFunction.__init__(
+            self, lambda n: self._sample(n / index_set.fs),
+            index_set=index_set)
+
+
+class ContinuousGaussianProcessResult(_GaussianProcessPath,
+                                      ContinuousTimeFunction):
+
+    def __init__(self, mean_func, cov_func, index_set, grid=None,
+                 grid_values=None, grid_whitened=None, conditioner=None):
+        self._init_path(mean_func, cov_func, index_set, grid,
+                        grid_values, grid_whitened, conditioner)
+        ContinuousTimeFunction.__init__(self, self._sample)
+        self.index_set = index_set
+
+
+def get_gaussian_process_result(mean_func, cov_func, index_set=Reals(),
+                                conditioner=None, grid=None,
+                                grid_values=None, grid_whitened=None):
 
     # Determine whether the process is discrete-time or continous-time
     if isinstance(index_set, DiscreteTimeSequence):
-        base_class = DiscreteTimeFunction
+        result_class = DiscreteGaussianProcessResult
     elif isinstance(index_set, Reals):
-        base_class = ContinuousTimeFunction
+        result_class = ContinuousGaussianProcessResult
     else:
         raise Exception(
             "Index set for Gaussian process must be Reals or "
             "DiscreteTimeSequence."
         )
-
-    class GaussianProcessResult(base_class):
-
-        def __init__(self, mean_func, cov_func):
-
-            self.mean = np.empty(shape=0)
-            self.cov = np.empty(shape=(0, 0))
-            self.times = []
-            self.values = []
-
-            def _func(t0):
-                # If this is a discrete process, t0 will be an index.
-                # Convert it to a time.
-                if isinstance(index_set, DiscreteTimeSequence):
-                    t0 /= index_set.fs
-
-                # Check that t0 is in the index set
-                if t0 not in index_set:
-                    raise KeyError(
-                        "Gaussian process is not defined at time %.2f." % t0
-                    )
-
-                # if variance is 0, just return the mean
-                if cov_func(t0, t0) == 0:
-                    return mean_func(t0)
-
-                # calculate conditional mean and variance
-                mean2 = mean_func(t0)
-                cov11 = self.cov + MACHINE_EPS * np.identity(len(self.times))
-                cov12 = [cov_func(t0, t) for t in self.times]
-                cov22 = cov_func(t0, t0)
-                cond_mean = (mean2 + (
-                    cov12 *
-                    np.linalg.solve(cov11, self.values - self.mean)
-                ).sum())
-                cond_var = (cov22 - (
-                    cov12 * np.linalg.solve(cov11, cov12)
-                ).sum())
-                cond_var = max(cond_var, 0)
-
-                # update mean vector and covariance matrix
-                self.mean = np.append(self.mean, mean2)
-                self.cov = np.column_stack((self.cov, cov12))
-                self.cov = np.vstack((
-                    self.cov,
-                    np.append(cov12, cov22)
-                ))
-
-                # simulate normal with given mean and variance
-                self.times.append(t0)
-                value = np.random.normal(cond_mean, np.sqrt(cond_var))
-                self.values.append(value)
-                return value
-
-            super().__init__(func=_func)
-            self.index_set = index_set
-
-    return GaussianProcessResult(mean_func, cov_func)
+    return result_class(mean_func, cov_func, index_set, grid,
+                        grid_values, grid_whitened, conditioner)
 
 
 class GaussianProcessProbabilitySpace(ProbabilitySpace):
@@ -98,6 +720,11 @@ class GaussianProcessProbabilitySpace(ProbabilitySpace):
           index_set: index set for the Gaussian process
                      (by default, all real numbers)
         """
+        self.mean_func = mean_func
+        self.cov_func = cov_func
+        self.index_set = index_set
+        # the last grid that paths were sampled on
+        self.grid = None
 
         def draw():
             return get_gaussian_process_result(
@@ -107,6 +734,91 @@ class GaussianProcessProbabilitySpace(ProbabilitySpace):
 
         super().__init__(draw)
 
+    def get_grid(self, times):
+        """Factor the covariance matrix of the given times (once)."""
+        times = np.asarray(times, dtype=float)
+        if self.grid is None or not np.array_equal(self.grid.times, times):
+            for t in times.tolist():
+                if t not in self.index_set:
+                    raise KeyError(
+                        "Gaussian process is not defined at time %.2f." % t
+                    )
+            self.grid = make_grid(self.mean_func, self.cov_func, times)
+        return self.grid
+
+    def get_low_rank_features(self, approximation, rank, times=None):
+        """Build a low-rank approximation to the covariance function.
+
+        Args:
+          approximation (str): "fourier" (random Fourier features) or
+            "nystrom" (inducing times equally spaced among the times)
+          rank (int): the rank of the approximation
+          times (list): the times the paths will be evaluated at
+            (needed to choose the inducing times for "nystrom")
+
+        Returns:
+          LowRankFeatures: the approximation
+        """
+        if approximation == "fourier":
+            return FourierFeatures(self.cov_func, rank)
+        elif approximation == "nystrom":
+            if times is None:
+                raise Exception(
+                    "Nystrom features need the times to choose the "
+                    "inducing times from."
+                )
+            times = np.unique(np.asarray(times, dtype=float))
+            inducing = times[np.linspace(0, len(times) - 1,
+                                         min(rank, len(times))).astype(int)]
+            return NystromFeatures(self.cov_func, inducing)
+        raise Exception(
+            "approximation must be \"fourier\" or \"nystrom\"."
+        )
+
+    def sim(self, n, times=None, approximation=None, rank=100):
+        """Simulate n draws from the probability space.
+
+        Args:
+          n (int): How many draws to make.
+          times (list): If specified, the n paths are first sampled
+            jointly at these times (see GaussianProcess.sim).
+          approximation (str): If specified, the paths are sampled from
+            a low-rank approximation to the process of the given rank
+            (see GaussianProcess.sim).
+
+        Returns:
+          Results: the simulation results.
+        """
+        if approximation is not None:
+            return self._sim_low_rank(n, times, approximation, rank)
+        if times is None:
+            return super().sim(n)
+        grid = self.get_grid(times)
+        values, whitened = grid.sample(n)
+        # (each path is backed by its row of the array of values)
+        sims = RVResults(
+            get_gaussian_process_result(
+                self.mean_func, self.cov_func, self.index_set,
+                grid=grid, grid_values=values[i],
+                grid_whitened=None if whitened is None else whitened[i])
+            for i in range(n))
+        sims.grid_values = values
+        return sims
+
+    def _sim_low_rank(self, n, times, approximation, rank):
+        factor = self.get_low_rank_features(approximation, rank, times)
+        weights = np.random.standard_normal((n, factor.rank))
+        coefficients = factor.coefficients(weights)
+        sims = RVResults(
+            get_gaussian_process_result(
+                self.mean_func, self.cov_func, self.index_set,
+                LowRankPath(self.mean_func, factor, coefficients[i]))
+            for i in range(n))
+        if times is not None:
+            sims.grid_values = factor.sample(self.mean_func, times, weights)
+            sims.approximation_error = factor.error(times)
+        return sims
+
 
 class GaussianProcess(RandomProcess, RV):
 
@@ -118,6 +830,14 @@ class GaussianProcess(RandomProcess, RV):
           cov_func: (auto)covariance function (function of two arguments)
           index_set: index set for the Gaussian process
                      (by default, all real numbers)
+
+        If mean_func and cov_func also work on (broadcast) numpy arrays
+        of times, like the kernels in symbulate.kernels (e.g., RBF,
+        Matern32), the means and covariances for many times are
+        computed in one call, instead of one call per time.
+
+        Example:
+          X = GaussianProcess(lambda t: 0, RBF(length_scale=2) + Periodic())
         """
 
         prob_space = GaussianProcessProbabilitySpace(mean_func,
@@ -125,10 +845,176 @@ class GaussianProcess(RandomProcess, RV):
                                                      index_set)
         RandomProcess.__init__(self, prob_space)
         RV.__init__(self, prob_space)
+        # the observations the process was conditioned on (if any)
+        self.posterior = None
+
+    def condition(self, times, values, noise=0):
+        """Condition the Gaussian process on observations.
+
+        The covariance matrix of the observations is factored once, and
+        the factor is shared by the posterior mean and covariance
+        functions (so by every path sampled from the posterior, and by
+        predict). Conditioning the result on more observations extends
+        the factor, instead of factoring it again.
+
+        Args:
+          times (list): the times of the observations
+          values (list): the observed values
+          noise: the standard deviation of the observation errors
+            (by default, 0, i.e., the values are observed exactly)
+
+        Returns:
+          GaussianProcess: the posterior Gaussian process
+
+        Example:
+          X = GaussianProcess(lambda t: 0, RBF())
+          Y = X.condition([0, 1, 2], [1.2, .3, -.5], noise=.1)
+          paths = Y.sim(100, times=np.linspace(0, 3, 31))
+          means, sds = Y.predict(np.linspace(0, 3, 31))
+        """
+        if self.posterior is None:
+            posterior = GaussianPosterior(self.prob_space.mean_func,
+                                          self.prob_space.cov_func,
+                                          times, values, noise)
+        else:
+            posterior = self.posterior.update(times, values, noise)
+        process = GaussianProcess(posterior.mean, posterior,
+                                  self.prob_space.index_set)
+        process.posterior = posterior
+        return process
+
+    def predict(self, times):
+        """The means and standard deviations of the process at the times.
+
+        Returns:
+          tuple: an array of means and an array of standard deviations
+        """
+        if self.posterior is not None:
+            return self.posterior.predict(times)
+        times = np.asarray(times, dtype=float)
+        sds = np.sqrt(broadcast_call(self.prob_space.cov_func, times, times))
+        return broadcast_call(self.prob_space.mean_func, times), sds
+
+    def sim(self, n, times=None, approximation=None, rank=100):
+        """Simulate n paths of the Gaussian process.
+
+        Args:
+          n (int): How many paths to simulate.
+          times (list): If specified, the covariance matrix of these
+            times is computed and factored once, and all n paths are
+            sampled at these times at once, by a single matrix product.
+            (If cov_func is Stationary and the times are equally spaced,
+            the paths are sampled by circulant embedding with FFTs
+            instead, in O(m log m) time for m times.)
+            The paths can still be evaluated at other times later, by
+            conditioning on their values at these times.
+          approximation (str): If specified, the paths are sampled
+            (approximately) from a low-rank approximation to the
+            process, which costs O(m r) per path for m times:
+              "fourier": random Fourier features (for Stationary
+                         kernels with a known spectral measure, like
+                         RBF and the Matern kernels)
+              "nystrom": the conditional mean given the values at
+                         rank inducing times, equally spaced among the
+                         times (for any covariance function)
+            The paths are functions that can be evaluated at any time.
+          rank (int): the rank r of the approximation
+
+        Returns:
+          RVResults: the n paths. (If times is specified, it also has
+            an attribute grid_values, an n x len(times) array of the
+            values of the paths at the times. If an approximation is
+            used, it also has an attribute approximation_error, the
+            relative error of the approximate covariance matrix of
+            the times.)
+
+        Example:
+          X = GaussianProcess(lambda t: 0, lambda s, t: exp(-abs(s - t)))
+          paths = X.sim(10000, times=np.linspace(0, 1, 101))
+          paths.grid_values.mean(axis=0)
+
+          X = GaussianProcess(lambda t: 0, RBF(length_scale=5))
+          paths = X.sim(10, times=np.linspace(0, 1000, 10 ** 5),
+                        approximation="fourier", rank=1000)
+        """
+        if times is None and approximation is None:
+            return super().sim(n)
+        return self.prob_space.sim(n, times=times,
+                                   approximation=approximation, rank=rank)
 
 
 # Define convenience class for Brownian motion
-class BrownianMotionProbabilitySpace(GaussianProcessProbabilitySpace):
+class BrownianMotionResult(ContinuousTimeFunction):
+    """A path of Brownian motion, sampled at times as they are needed.
+
+    The sampled times are kept in sorted order. A time after the last
+    one is sampled from an independent normal increment, and a time
+    between two sampled times is sampled from the Brownian bridge
+    between them, so each new time costs O(log k) to locate, instead
+    of conditioning on all k of the previous values.
+
+    Args:
+      drift: drift parameter of Brownian motion
+      scale: scale parameter of Brownian motion
+      times (np.ndarray): sorted times the path is already known at
+      values (np.ndarray): the values of the path at those times
+    """
+
+    def __init__(self, drift=0, scale=1, times=None, values=None):
+        self.drift = drift
+        self.scale = scale
+        # (the path starts at 0 at time 0)
+        if times is None:
+            times, values = np.zeros(1), np.zeros(1)
+        self.times = ArrayBuffer.from_array(times)
+        self.values = ArrayBuffer.from_array(values)
+        super().__init__(self._sample)
+
+    def _sample(self, t):
+        if t < 0:
+            raise KeyError("Brownian motion is not defined at time %.2f." % t)
+        times = self.times.array
+        i = np.searchsorted(times, t)
+        if i < len(times) and times[i] == t:
+            return self.values[i]
+        if i == len(times):
+            # an independent increment after the last time
+            dt = t - times[-1]
+            value = (self.values[-1] + self.drift * dt +
+                     self.scale * np.sqrt(dt) * np.random.standard_normal())
+            self.times.append(t)
+            self.values.append(value)
+        else:
+            # the Brownian bridge between the neighboring times
+            s, u = times[i - 1], times[i]
+            x, y = self.values[i - 1], self.values[i]
+            mean = x + (t - s) / (u - s) * (y - x)
+            sd = self.scale * np.sqrt((t - s) * (u - t) / (u - s))
+            value = mean + sd * np.random.standard_normal()
+            self.times.insert(i, t)
+            self.values.insert(i, value)
+        return value
+
+    def __call__(self, t):
+        if is_numeric_vector(t) and len(t) > 0:
+            # the times after the last sampled time are sampled at once,
+            # by a cumulative sum of independent increments
+            new = np.unique(np.asarray(t, dtype=float))
+            new = new[new > self.times[-1]]
+            if len(new) > 0:
+                dt = np.diff(new, prepend=self.times[-1])
+                self.values.extend(self.values[-1] + np.cumsum(
+                    self.drift * dt +
+                    self.scale * np.sqrt(dt) *
+                    np.random.standard_normal(len(dt))))
+                self.times.extend(new)
+        return super().__call__(t)
+
+
+class BrownianMotionProbabilitySpace(ProbabilitySpace):
+
+    # the number of increments to sample at once
+    block_size = 2 ** 20
 
     def __init__(self, drift=0, scale=1):
         """Initialize probability space for Brownian motion.
@@ -137,10 +1023,62 @@ class BrownianMotionProbabilitySpace(GaussianProcessProbabilitySpace):
           drift: drift parameter of Brownian motion
           scale: scale parameter of Brownian motion
         """
-        super().__init__(
-            mean_func=lambda t: drift * t,
-            cov_func=lambda s, t: (scale ** 2) * min(s, t)
-        )
+        self.drift = drift
+        self.scale = scale
+        self.mean_func = lambda t: drift * t
+        self.cov_func = Brownian(scale ** 2)
+
+        def draw():
+            return BrownianMotionResult(drift, scale)
+
+        super().__init__(draw)
+
+    def sim(self, n, times=None):
+        """Simulate n draws from the probability space.
+
+        Args:
+          n (int): How many draws to make.
+          times (list): If specified, the n paths are first sampled
+            at these times, all at once, by cumulative sums of
+            independent normal increments.
+
+        Returns:
+          Results: the simulation results.
+        """
+        if times is None:
+            return super().sim(n)
+        times = np.asarray(times, dtype=float)
+        if np.any(times < 0):
+            raise Exception("times must be non-negative.")
+        # the sorted times, starting from time 0
+        # (if the times are already sorted and unique, the values at
+        #  them are a view of the values on the grid, not a copy)
+        if len(times) > 0 and np.all(np.diff(times) > 0):
+            grid = times if times[0] == 0 else np.append(0, times)
+            inverse = None
+        else:
+            grid, inverse = np.unique(np.append(0, times),
+                                      return_inverse=True)
+        dt = np.diff(grid)
+        # The increments are sampled a block of rows at a time, and
+        # then summed in place, so that there is only one n x m array.
+        values = np.zeros((n, len(grid)))
+        rows = max(self.block_size // max(len(dt), 1), 1)
+        for start in range(0, n, rows):
+            values[start:start + rows, 1:] = np.random.standard_normal(
+                (min(rows, n - start), len(dt)))
+        increments = values[:, 1:]
+        increments *= self.scale * np.sqrt(dt)
+        increments += self.drift * dt
+        np.cumsum(increments, axis=1, out=increments)
+        sims = RVResults(
+            BrownianMotionResult(self.drift, self.scale, grid, values[i])
+            for i in range(n))
+        if inverse is not None:
+            sims.grid_values = values[:, inverse[1:]]
+        else:
+            sims.grid_values = values[:, len(grid) - len(times):]
+        return sims
 
 
 class BrownianMotion(RandomProcess, RV):
@@ -157,3 +1095,21 @@ class BrownianMotion(RandomProcess, RV):
         )
         RandomProcess.__init__(self, prob_space)
         RV.__init__(self, prob_space)
+
+    def sim(self, n, times=None):
+        """Simulate n paths of Brownian motion.
+
+        Args:
+          n (int): How many paths to simulate.
+          times (list): If specified, all n paths are sampled at these
+            times at once. The paths can still be evaluated at other
+            times later (between the times, by Brownian bridges).
+
+        Returns:
+          RVResults: the n paths. (If times is specified, it also has
+            an attribute grid_values, an n x len(times) array of the
+            values of the paths at the times.)
+        """
+        if times is None:
+            return super().sim(n)
+        return self.prob_space.sim(n, times=times)
@@ -56,7 +56,10 @@ class DiscreteTimeSequence(IndexSet):
         return n / self.fs
 
     def __contains__(self, value):
-        return float(value * self.fs).is_integer()
+        # (the product is rounded, since times like n / fs are
+        #  not exactly representable, e.g., 7 / 100 * 100 != 7)
+        n = value * self.fs
+        return abs(n - round(n)) <= 1e-9 * max(1, abs(n))
 
     def __eq__(self, index):
         return (
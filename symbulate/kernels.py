@@ -0,0 +1,335 @@
+"""Covariance functions (kernels) for Gaussian processes.
+
+Any function of two times can be used as the covariance function
+of a GaussianProcess. If the function also works on (broadcast)
+numpy arrays of times, whole covariance matrices are computed in
+a single call, instead of one call per pair of times.
+
+The kernels in this module all work on arrays, and they can be
+added and multiplied to build new kernels, e.g.,
+
+    cov = RBF(length_scale=2) + .1 * Matern12()
+
+The Stationary kernels also declare that they only depend on the
+lag t - s, which the Gaussian process uses to sample them faster.
+"""
+import math
+import operator
+
+import numpy as np
+
+
+def broadcast_call(func, *args):
+    """Evaluate func on broadcast arrays, in one call if possible.
+
+    func is first called on the arrays themselves. If that fails, or
+    if the result does not agree with calling func on the first and
+    last elements one at a time (e.g., because func uses the built-in
+    min), func is called once for each element instead.
+
+    Returns:
+      np.ndarray: the values of func, of the broadcast shape of args
+    """
+    arrays = np.broadcast_arrays(*[np.asarray(arg, dtype=float)
+                                   for arg in args])
+    shape = arrays[0].shape
+    if arrays[0].size == 0:
+        return np.zeros(shape)
+    try:
+        values = np.array(np.broadcast_to(
+            np.asarray(func(*arrays), dtype=float), shape))
+    except Exception:
+        values = None
+    else:
+        for i in (0, -1):
+            value = float(func(*[array.flat[i] for array in arrays]))
+            if not (math.isclose(values.flat[i], value, rel_tol=1e-9,
+                                 abs_tol=1e-12) or
+                    (math.isnan(value) and math.isnan(values.flat[i]))):
+                values = None
+                break
+    if values is None:
+        values = np.array([func(*point) for point in
+                           zip(*[array.ravel().tolist()
+                                 for array in arrays])],
+                          dtype=float).reshape(shape)
+    return values
+
+
+class Kernel:
+    """A covariance function that works on broadcast arrays of times.
+
+    Args:
+      func: a function of two times s and t, which (like numpy
+        functions) also works on arrays of times
+
+    Example:
+      cov = Kernel(lambda s, t: np.minimum(s, t) ** 2)
+    """
+
+    def __init__(self, func):
+        self._func = func
+
+    def __call__(self, s, t):
+        return self._func(s, t)
+
+    def matrix(self, s, t=None):
+        """The matrix of covariances between the times s and t.
+
+        Args:
+          s (array_like): the times for the rows
+          t (array_like): the times for the columns (by default, s)
+
+        Returns:
+          np.ndarray: a len(s) x len(t) matrix
+        """
+        s = np.asarray(s, dtype=float)
+        t = s if t is None else np.asarray(t, dtype=float)
+        return broadcast_call(self, s[:, np.newaxis], t[np.newaxis, :])
+
+    def __add__(self, other):
+        return _combine(operator.add, self, other)
+
+    def __radd__(self, other):
+        return _combine(operator.add, other, self)
+
+    def __mul__(self, other):
+        return _combine(operator.mul, self, other)
+
+    def __rmul__(self, other):
+        return _combine(operator.mul, other, self)
+
+
+class Stationary(Kernel):
+    """A stationary covariance function, cov(s, t) = func(t - s).
+
+    The covariance matrix of a stationary process on a regular grid of
+    times only depends on the lags between the times, so paths on the
+    grid can be sampled by circulant embedding with FFTs, in
+    O(m log m) time for m times, instead of O(m^3) time.
+
+    Args:
+      func: the covariance as a function of the lag t - s
+
+    Example:
+      cov = Stationary(lambda h: exp(-abs(h)))
+      X = GaussianProcess(lambda t: 0, cov, DiscreteTimeSequence(100))
+      paths = X.sim(10, times=np.arange(2 ** 20) / 100)
+    """
+
+    # By Bochner's theorem, func(h) = func(0) E[cos(W h)], where W is a
+    # random frequency. Kernels whose spectral measure (the distribution
+    # of W) is known define spectral_sample(size), which samples size
+    # (angular) frequencies; this is what random Fourier features need.
+    spectral_sample = None
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, s, t):
+        return self.func(np.subtract(t, s))
+
+
+def _combine(op, kernel1, kernel2):
+    # The sum or product of two kernels (or of a kernel and a number).
+    # The result is stationary if both of the kernels are.
+    kernels = []
+    for kernel in (kernel1, kernel2):
+        if not callable(kernel):
+            kernel = Constant(kernel)
+        kernels.append(kernel)
+    kernel1, kernel2 = kernels
+    if isinstance(kernel1, Stationary) and isinstance(kernel2, Stationary):
+        return _StationaryCombination(op, kernel1, kernel2)
+    return Kernel(lambda s, t: op(kernel1(s, t), kernel2(s, t)))
+
+
+class _StationaryCombination(Stationary):
+    # The sum or product of two stationary kernels. The spectral measure
+    # of a sum is a mixture of the two measures, and the spectral
+    # measure of a product is the distribution of the sum of the two
+    # frequencies.
+
+    def __init__(self, op, kernel1, kernel2):
+        self.op = op
+        self.kernels = (kernel1, kernel2)
+        if kernel1.spectral_sample is None or kernel2.spectral_sample is None:
+            self.spectral_sample = None
+
+    def func(self, h):
+        return self.op(self.kernels[0].func(h), self.kernels[1].func(h))
+
+    def spectral_sample(self, size):
+        kernel1, kernel2 = self.kernels
+        if self.op is operator.mul:
+            return kernel1.spectral_sample(size) + kernel2.spectral_sample(size)
+        weight = kernel1.func(0) / (kernel1.func(0) + kernel2.func(0))
+        return np.where(np.random.random_sample(size) < weight,
+                        kernel1.spectral_sample(size),
+                        kernel2.spectral_sample(size))
+
+
+class Constant(Stationary):
+    """The constant covariance function, cov(s, t) = variance."""
+
+    def __init__(self, variance=1):
+        self.variance = variance
+
+    def func(self, h):
+        return self.variance * np.ones_like(h, dtype=float)
+
+    def spectral_sample(self, size):
+        return np.zeros(size)
+
+
+class RBF(Stationary):
+    """The radial basis function (squared exponential) kernel,
+
+        cov(s, t) = variance * exp(-(t - s)^2 / (2 length_scale^2)).
+
+    Args:
+      length_scale: how far apart times can be and still be correlated
+      variance: the variance at each time
+    """
+
+    def __init__(self, length_scale=1, variance=1):
+        self.length_scale = length_scale
+        self.variance = variance
+
+    def func(self, h):
+        r = np.abs(h) / self.length_scale
+        return self.variance * np.exp(-r ** 2 / 2)
+
+    def spectral_sample(self, size):
+        return np.random.standard_normal(size) / self.length_scale
+
+
+class Matern12(Stationary):
+    """The Matern kernel with smoothness 1/2 (the exponential kernel),
+
+        cov(s, t) = variance * exp(-|t - s| / length_scale).
+
+    Args:
+      length_scale: how far apart times can be and still be correlated
+      variance: the variance at each time
+    """
+
+    def __init__(self, length_scale=1, variance=1):
+        self.length_scale = length_scale
+        self.variance = variance
+
+    def func(self, h):
+        r = np.abs(h) / self.length_scale
+        return self.variance * np.exp(-r)
+
+    def spectral_sample(self, size):
+        # (the spectral measure of the Matern kernel with smoothness nu
+        #  is a t distribution with 2 nu degrees of freedom)
+        return np.random.standard_t(1, size) / self.length_scale
+
+
+class Matern32(Stationary):
+    """The Matern kernel with smoothness 3/2,
+
+        cov(s, t) = variance * (1 + sqrt(3) r) exp(-sqrt(3) r),
+
+    where r = |t - s| / length_scale.
+
+    Args:
+      length_scale: how far apart times can be and still be correlated
+      variance: the variance at each time
+    """
+
+    def __init__(self, length_scale=1, variance=1):
+        self.length_scale = length_scale
+        self.variance = variance
+
+    def func(self, h):
+        r = np.sqrt(3) * np.abs(h) / self.length_scale
+        return self.variance * (1 + r) * np.exp(-r)
+
+    def spectral_sample(self, size):
+        return np.random.standard_t(3, size) / self.length_scale
+
+
+class Matern52(Stationary):
+    """The Matern kernel with smoothness 5/2,
+
+        cov(s, t) = variance * (1 + sqrt(5) r + 5 r^2 / 3) exp(-sqrt(5) r),
+
+    where r = |t - s| / length_scale.
+
+    Args:
+      length_scale: how far apart times can be and still be correlated
+      variance: the variance at each time
+    """
+
+    def __init__(self, length_scale=1, variance=1):
+        self.length_scale = length_scale
+        self.variance = variance
+
+    def func(self, h):
+        r = np.sqrt(5) * np.abs(h) / self.length_scale
+        return self.variance * (1 + r + r ** 2 / 3) * np.exp(-r)
+
+    def spectral_sample(self, size):
+        return np.random.standard_t(5, size) / self.length_scale
+
+
+class Periodic(Stationary):
+    """The periodic kernel,
+
+        cov(s, t) = variance * exp(-2 sin^2(pi |t - s| / period)
+                                   / length_scale^2).
+
+    Args:
+      length_scale: how correlated times within a period are
+      period: the period of the paths
+      variance: the variance at each time
+    """
+
+    def __init__(self, length_scale=1, period=1, variance=1):
+        self.length_scale = length_scale
+        self.period = period
+        self.variance = variance
+
+    def func(self, h):
+        sine = np.sin(np.pi * np.abs(h) / self.period)
+        return self.variance * np.exp(-2 * (sine / self.length_scale) ** 2)
+
+
+class OrnsteinUhlenbeck(Stationary):
+    """The covariance of a stationary Ornstein-Uhlenbeck process,
+    dX = -theta X dt + sigma dB,
+
+        cov(s, t) = sigma^2 / (2 theta) * exp(-theta |t - s|).
+
+    Args:
+      theta: the rate of mean reversion
+      sigma: the scale of the noise
+    """
+
+    def __init__(self, theta=1, sigma=1):
+        self.theta = theta
+        self.sigma = sigma
+
+    def func(self, h):
+        return (self.sigma ** 2 / (2 * self.theta) *
+                np.exp(-self.theta * np.abs(h)))
+
+    def spectral_sample(self, size):
+        return self.theta * np.random.standard_cauchy(size)
+
+
+class Brownian(Kernel):
+    """The covariance of Brownian motion, cov(s, t) = variance * min(s, t).
+
+    Args:
+      variance: the variance of the process at time 1
+    """
+
+    def __init__(self, variance=1):
+        self.variance = variance
+
+    def __call__(self, s, t):
+        return self.variance * np.minimum(s, t)
@@ -1,36 +1,61 @@
+import collections
+
 import numpy as np
+import scipy.linalg as linalg
+import scipy.sparse as sparse
+import scipy.sparse.linalg as sparse_linalg
 
-from .distributions import Exponential
 from .math import inf
 from .probability_space import ProbabilitySpace
 from .random_variables import RV
 from .result import (
-    InfiniteVector, ContinuousTimeFunction, DiscreteValued
+    ArrayBuffer, InfiniteVector, JumpFunction, DiscreteValued,
+    is_numeric_vector
 )
+from .sampling import AliasTable
+from .table import Table
 
 EPS = 1e-15
 
 
-class MarkovChainResult(InfiniteVector, DiscreteValued):
+class MarkovKernel:
+    """A transition matrix, validated and compiled for sampling.
+
+    The kernel is built once per probability space and is shared
+    by every path simulated from it. States are coded internally
+    as the integers 0, 1, ..., n-1. (Use compile_kernel to get a
+    SparseMarkovKernel when the transition matrix is sparse.)
+
+    Args:
+      transition_matrix: n x n transition matrix
+      initial_dist: length n vector of the initial distribution
+      state_labels: length n vector of the labels of each state
+                    (defaults to 0, 1, ..., n-1)
+
+    Attributes:
+      n_states (int): the number of states
+      transition_matrix (np.ndarray): the transition matrix
+      initial_dist (np.ndarray): the initial distribution
+      state_labels: the labels of each state
+      alias_table (AliasTable): an alias table for each row of the
+        transition matrix
+      cum_initial (np.ndarray): the cumulative initial distribution
+      state_dtype (np.dtype): the smallest unsigned integer dtype that
+        can hold the code of every state
+      label_array (np.ndarray): the state labels as an array
+        (None if the states are unlabeled)
+    """
 
     def __init__(self, transition_matrix, initial_dist, state_labels=None):
-        # Check transition matrix
-        for row in transition_matrix:
-            if abs(sum(row) - 1) > EPS:
-                raise Exception("Rows of a transition matrix must sum to 1.")
-            for p in row:
-                if p < 0:
-                    raise Exception("Probabilities cannot be negative.")
-        # Check that dimensions agree
-        self.transition_matrix = np.asarray(transition_matrix)
-        m, n = self.transition_matrix.shape
-        if m != n:
-            raise Exception("Transition matrix must be square.")
+        self.transition_matrix = self._check_transition_matrix(
+            transition_matrix)
+        n = self.transition_matrix.shape[0]
+        # Check initial distribution
         if len(initial_dist) != n:
             raise Exception("Initial distribution must be a vector whose "
                             "length matches the dimensions of the "
                             "transition matrix.")
-        self.initial_dist = initial_dist
+        self.initial_dist = np.asarray(initial_dist, dtype=float)
         # Process state labels
         if state_labels is not None:
             if len(state_labels) != n:
@@ -40,30 +65,423 @@ class MarkovChainResult(InfiniteVector, DiscreteValued):
         else:
             self.state_labels = range(n)
         self.n_states = n
+        self.state_dtype = np.min_scalar_type(max(n - 1, 0))
+        self.label_array = (None if state_labels is None
+                            else _label_array(state_labels))
+
+        # (The last entry is set to exactly 1 so that rounding
+        #  error can never produce an invalid state.)
+        self.cum_initial = np.cumsum(self.initial_dist)
+        self.cum_initial[-1] = 1
+
+        self._compile()
+
+    def _check_transition_matrix(self, transition_matrix):
+        P = np.asarray(transition_matrix, dtype=float)
+        if P.ndim != 2 or P.shape[0] != P.shape[1]:
+            raise Exception("Transition matrix must be square.")
+        # Check transition matrix (allowing for rounding error in
+        # the row sums, which grows with the number of states)
+        if np.any(P < 0):
+            raise Exception("Probabilities cannot be negative.")
+        if np.any(np.abs(P.sum(axis=1) - 1) > P.shape[0] * EPS):
+            raise Exception("Rows of a transition matrix must sum to 1.")
+        return P
+
+    def _compile(self):
+        # Alias tables, so that every step of every path takes O(1) time.
+        self.alias_table = AliasTable(self.transition_matrix)
+
+        # Cache of the powers P, P^2, P^4, P^8, ... of the
+        # transition matrix, for exact n-step distributions.
+        self.matrix_powers = [self.transition_matrix]
+
+    def initial_states(self, size=None):
+        """Draw initial states (as integer codes)."""
+        states = np.searchsorted(self.cum_initial,
+                                 np.random.random_sample(size),
+                                 side="right")
+        if size is None:
+            return int(states)
+        return states
+
+    def next_states(self, states):
+        """Draw the next state of many chains at once.
+
+        Args:
+          states (np.ndarray): the current state (as an integer code)
+            of each chain
+
+        Returns:
+          np.ndarray: the next state of each chain
+        """
+        return self.alias_table.sample_rows(states)
+
+    def path(self, state, steps):
+        """Draw the next steps states of a single chain.
+
+        Args:
+          state (int): the current state (as an integer code)
+          steps (int): how many steps to take
+
+        Returns:
+          list: the states visited after the current state
+        """
+        return self.alias_table.walk(state, steps)
+
+    def distribution_at(self, n):
+        """Calculate the exact distribution of the state at time n.
+
+        The distribution is the initial distribution times P^n, which
+        is computed by repeated squaring. The squares are cached, so
+        later calls only cost a few vector-matrix products.
+
+        Args:
+          n (int): the time (a non-negative integer)
+
+        Returns:
+          np.ndarray: the probability of each state at time n
+        """
+        n = _check_time(n)
+        dist = self.initial_dist
+        k = 0
+        while n > 0:
+            if k == len(self.matrix_powers):
+                last = self.matrix_powers[-1]
+                self.matrix_powers.append(last @ last)
+            if n & 1:
+                dist = dist @ self.matrix_powers[k]
+            n >>= 1
+            k += 1
+        return dist
+
+    def _solve(self, A, b):
+        return np.linalg.solve(A, b)
+
+    def _identity(self, n):
+        return np.identity(n)
+
+    def _solve_balance(self, A):
+        # Solves A pi = 0 (the balance equations, with A = P^T - I or
+        # Q^T), with the entries of pi summing to 1, by replacing one
+        # of the (redundant) equations by the constraint on the sum.
+        A = np.array(A)
+        A[-1, :] = 1
+        b = np.zeros(self.n_states)
+        b[-1] = 1
+        try:
+            return self._solve(A, b)
+        except np.linalg.LinAlgError:
+            raise Exception("The Markov chain does not have a "
+                            "unique stationary distribution.")
+
+    def stationary_distribution(self):
+        """Calculate the stationary distribution.
+
+        Solves pi P = pi, with the entries of pi summing to 1.
+
+        Returns:
+          np.ndarray: the stationary probability of each state
+        """
+        return self._solve_balance(
+            self.transition_matrix.T - self._identity(self.n_states))
+
+    def hitting_times(self, targets):
+        """Calculate the expected number of steps to reach a set of states.
+
+        Args:
+          targets (list): the integer codes of the target states
+
+        Returns:
+          np.ndarray: the expected hitting time from each state
+            (0 for the target states themselves)
+        """
+        others = np.setdiff1d(np.arange(self.n_states), targets)
+        A = (self._identity(len(others)) -
+             self.transition_matrix[others, :][:, others])
+        times = np.zeros(self.n_states)
+        try:
+            times[others] = self._solve(A, np.ones(len(others)))
+        except np.linalg.LinAlgError:
+            raise Exception("The target states cannot be reached "
+                            "from every state.")
+        return times
+
+    def path_blocks(self, steps, block_size=2 ** 16):
+        """Simulate a single path, a block of states at a time.
+
+        Only the current block is kept in memory, so statistics of
+        very long paths can be accumulated in O(block_size) memory.
+
+        Args:
+          steps (int): the number of states to simulate
+          block_size (int): the number of states in each block
+
+        Yields:
+          np.ndarray: the codes of the next states of the path,
+            starting with the initial state X_0
+        """
+        if steps < 1 or int(steps) != steps:
+            raise Exception("steps must be a positive integer.")
+        state = self.initial_states()
+        codes = [state] + self.path(state, min(steps, block_size) - 1)
+        done = len(codes)
+        while True:
+            yield np.array(codes, dtype=self.state_dtype)
+            if done >= steps:
+                return
+            codes = self.path(codes[-1], min(steps - done, block_size))
+            done += len(codes)
+
+    def occupancy(self, steps):
+        """Count the visits to each state by X_0, ..., X_{steps-1}."""
+        counts = np.zeros(self.n_states, dtype=int)
+        for codes in self.path_blocks(steps):
+            counts += np.bincount(codes, minlength=self.n_states)
+        return counts
+
+    def transition_counts(self, steps):
+        """Count the transitions (i, j) made in the first steps steps.
+
+        Returns:
+          An n x n array (or a sparse matrix, for a sparse kernel)
+          whose (i, j) entry is the number of transitions from i to j.
+        """
+        counts = sparse.csr_matrix((self.n_states, self.n_states),
+                                   dtype=int)
+        previous = None
+        for codes in self.path_blocks(steps + 1):
+            if previous is not None:
+                codes = np.concatenate(([previous], codes))
+            counts += sparse.csr_matrix(
+                (np.ones(len(codes) - 1, dtype=int),
+                 (codes[:-1], codes[1:])),
+                shape=counts.shape)
+            previous = codes[-1]
+        if sparse.issparse(self.transition_matrix):
+            return counts
+        return counts.toarray()
+
+    def time_average(self, values, steps, batches=20):
+        """Average a function of the state over X_0, ..., X_{steps-1}.
+
+        The path is split into consecutive batches, and the standard
+        error is estimated from the spread of the batch means (the
+        method of batch means), which accounts for the dependence
+        between nearby states of the chain.
+
+        Args:
+          values (np.ndarray): the value of the function at each state
+          steps (int): the number of states to average over
+          batches (int): the number of batches
+
+        Returns:
+          tuple: the time average and its estimated standard error
+        """
+        if batches < 2 or steps < batches:
+            raise Exception("There must be at least 2 batches, "
+                            "and at least as many steps as batches.")
+        values = np.asarray(values, dtype=float)
+        sums = np.zeros(batches)
+        start = 0
+        for codes in self.path_blocks(steps):
+            times = np.arange(start, start + len(codes))
+            sums += np.bincount(times * batches // steps,
+                                weights=values[codes],
+                                minlength=batches)
+            start += len(codes)
+        lengths = np.diff(np.arange(batches + 1) * steps // batches)
+        batch_means = sums / lengths
+        return (sums.sum() / steps,
+                batch_means.std(ddof=1) / np.sqrt(batches))
+
+    def decode(self, states):
+        """Map an array of integer codes to the state labels."""
+        if self.label_array is None:
+            return states
+        return self.label_array[states]
+
+    def make_table(self, values):
+        """Return a Table with the value for each state label."""
+        labels = list(self.state_labels)
+        return Table(dict(zip(labels, values)), labels)
+
+
+class SparseMarkovKernel(MarkovKernel):
+    """A sparse transition matrix, validated and compiled for sampling.
+
+    Everything is done in time proportional to the number of nonzero
+    entries (nnz), rather than to the square of the number of states:
+    the matrix is validated through its CSR arrays, each step is
+    sampled by a search in the cumulative probabilities of the row,
+    and the exact calculations use sparse products and solvers.
+
+    Attributes:
+      transition_matrix (scipy.sparse.csr_matrix): the transition matrix
+      offset_cum (np.ndarray): the cumulative probabilities within each
+        row, in CSR order, plus the row index (which makes the whole
+        array sorted, so one search finds the next state of any row)
+      transposed (scipy.sparse.csr_matrix): the transpose of the
+        transition matrix, for advancing distributions
+    """
+
+    def _check_transition_matrix(self, transition_matrix):
+        P = sparse.csr_matrix(transition_matrix, dtype=float)
+        if P.shape[0] != P.shape[1]:
+            raise Exception("Transition matrix must be square.")
+        P.sum_duplicates()
+        if np.any(P.data < 0):
+            raise Exception("Probabilities cannot be negative.")
+        row_sums = np.asarray(P.sum(axis=1)).ravel()
+        if np.any(np.abs(row_sums - 1) > P.shape[0] * EPS):
+            raise Exception("Rows of a transition matrix must sum to 1.")
+        return P
+
+    def _compile(self):
+        P = self.transition_matrix
+        row_lengths = np.diff(P.indptr)
+        rows = np.repeat(np.arange(self.n_states), row_lengths)
+        # cumulative sums within each row
+        cum = np.cumsum(P.data)
+        row_starts = np.concatenate(([0.], cum))[P.indptr[:-1]]
+        cum -= np.repeat(row_starts, row_lengths)
+        cum[P.indptr[1:] - 1] = 1
+        self.offset_cum = rows + cum
+        self.transposed = P.T.tocsr()
+        # current time and distribution, for exact calculations
+        self.cached_time = 0
+        self.cached_dist = self.initial_dist
+
+    def _sample(self, states, u):
+        positions = np.searchsorted(self.offset_cum, states + u, side="right")
+        return self.transition_matrix.indices[positions]
+
+    def next_states(self, states):
+        return self._sample(states, np.random.random_sample(len(states)))
+
+    def path(self, state, steps):
+        indexes = []
+        for u in np.random.random_sample(steps).tolist():
+            state = int(self._sample(state, u))
+            indexes.append(state)
+        return indexes
+
+    def distribution_at(self, n):
+        """Calculate the exact distribution of the state at time n.
+
+        Powers of a sparse matrix quickly fill in, so the distribution
+        is advanced by sparse vector-matrix products instead, starting
+        from the last time that was calculated (if it was earlier).
+        """
+        n = _check_time(n)
+        if n < self.cached_time:
+            self.cached_time = 0
+            self.cached_dist = self.initial_dist
+        dist = self.cached_dist
+        for _ in range(self.cached_time, n):
+            dist = self.transposed @ dist
+        self.cached_time, self.cached_dist = n, dist
+        return dist
+
+    def _solve(self, A, b):
+        x = sparse_linalg.spsolve(sparse.csc_matrix(A), b)
+        if not np.all(np.isfinite(x)):
+            raise np.linalg.LinAlgError("Singular matrix")
+        return x
+
+    def _identity(self, n):
+        return sparse.identity(n, format="csr")
+
+    def _solve_balance(self, A):
+        # A row of ones would fill in the LU factors, so instead the
+        # last entry of pi is pinned to 1: the first n - 1 equations
+        # are solved for the other entries, and then pi is normalized.
+        if self.n_states == 1:
+            return np.ones(1)
+        A = sparse.csc_matrix(A)
+        try:
+            pi = np.append(
+                self._solve(A[:-1, :-1], -A[:-1, -1].toarray().ravel()), 1)
+        except np.linalg.LinAlgError:
+            raise Exception("The Markov chain does not have a "
+                            "unique stationary distribution.")
+        return pi / pi.sum()
+
+
+def compile_kernel(transition_matrix, initial_dist, state_labels=None):
+    """Compile a transition matrix (dense or scipy.sparse) once."""
+    if sparse.issparse(transition_matrix):
+        return SparseMarkovKernel(transition_matrix, initial_dist,
+                                  state_labels)
+    return MarkovKernel(transition_matrix, initial_dist, state_labels)
+
+
+def _label_array(labels):
+    # A 1-D array of labels (an object array if the labels are,
+    # e.g., tuples, which numpy would turn into a 2-D array).
+    array = np.asarray(labels)
+    if array.ndim != 1:
+        array = np.empty(len(labels), dtype=object)
+        for i, label in enumerate(labels):
+            array[i] = label
+    return array
+
+
+def _diagonal_matrix(values, like):
+    # A diagonal matrix, sparse if the matrix like is sparse.
+    if sparse.issparse(like):
+        return sparse.diags(values, format="csr")
+    return np.diag(values)
+
+
+def _check_time(n):
+    if n < 0 or int(n) != n:
+        raise Exception("n must be a non-negative integer.")
+    return int(n)
+
+
+class MarkovChainResult(InfiniteVector, DiscreteValued):
+
+    def __init__(self, kernel):
+        # The kernel is shared with the probability space, so no
+        # validation or setup is done per path.
+        self.kernel = kernel
+        self.state_labels = kernel.state_labels
+        self.n_states = kernel.n_states
 
         # Generate initial state.
-        # (self.states stores the indexes of the states, while
-        #  self.values stores the labels of the states.)
-        state = np.random.choice(range(n), p=self.initial_dist)
-        self.states = [state]
+        # (self.states stores the integer codes of the states, in the
+        #  smallest dtype that fits; they are only mapped to the labels
+        #  of the states when they are accessed.)
+        self.states = ArrayBuffer(kernel.state_dtype)
+        self.states.append(kernel.initial_states())
 
         def _func(n):
-            m = len(self.states)
-            # If nth state not generated yet, generate it.
-            if n >= m:
-                state = self.states[m - 1]
-                for _ in range(m, n + 1):
-                    state = np.random.choice(
-                        range(self.n_states),
-                        p=self.transition_matrix[state, :]
-                    )
-                    self.states.append(state)
-            else:
-                state = self.states[n]
-            return self.state_labels[state]
+            self._generate(n)
+            return self.state_labels[self.states[n]]
 
         super().__init__(_func)
 
+    def _generate(self, n):
+        # If nth state not generated yet, generate it
+        # (at least doubling the length of the path, so that short
+        #  paths stay short and long paths grow in amortized O(1)).
+        m = len(self.states)
+        if n >= m:
+            steps = max(n + 1 - m, m, 1)
+            self.states.extend(
+                self.kernel.path(int(self.states[m - 1]), steps)
+            )
+
+    def __getitem__(self, n):
+        # The labels are not cached, since the codes are already stored.
+        if isinstance(n, slice):
+            if n.stop is None:
+                raise Exception("Slices of a Markov chain must have a stop.")
+            self._generate(n.stop)
+            return self.kernel.decode(self.states[n]).tolist()
+        return self.func(n)
+
     def get_states(self):
         return self
 
@@ -79,14 +497,38 @@ class MarkovChainProbabilitySpace(ProbabilitySpace):
           state_labels: length n vector of the labels of each state
                         (defaults to 0, 1, ..., n-1)
         """
-
-        def _draw():
-            return MarkovChainResult(transition_matrix,
+        # Validate and compile the transition matrix once.
+        self.kernel = compile_kernel(transition_matrix,
                                      initial_dist,
                                      state_labels)
+        self.state_labels = state_labels
+
+        def _draw():
+            return MarkovChainResult(self.kernel)
 
         super().__init__(_draw)
 
+    def sim(self, n, horizon=None):
+        """Simulate n draws from the probability space.
+
+        Args:
+          n (int): How many draws to make.
+          horizon (int): If specified, the n paths are simulated
+            together up to time horizon, and an n x (horizon + 1)
+            array of states is returned instead.
+
+        Returns:
+          Results (or an array): the simulation results.
+        """
+        if horizon is None:
+            return super().sim(n)
+        # Fill in one time step (a contiguous row) at a time.
+        states = np.empty((horizon + 1, n), dtype=self.kernel.state_dtype)
+        states[0] = self.kernel.initial_states(n)
+        for t in range(horizon):
+            states[t + 1] = self.kernel.next_states(states[t])
+        return self.kernel.decode(np.ascontiguousarray(states.T))
+
 
 class MarkovChain(RV):
 
@@ -106,68 +548,191 @@ class MarkovChain(RV):
             state_labels)
         super().__init__(prob_space)
 
+    def sim(self, n, horizon=None):
+        """Simulate n paths of the Markov chain.
+
+        Args:
+          n (int): How many paths to simulate.
+          horizon (int): If specified, all n paths are simulated at
+            once, a time step at a time, up to time horizon.
+
+        Returns:
+          RVResults: the n (lazily generated) paths, if horizon is None.
+          Otherwise, an n x (horizon + 1) array whose rows are the
+          states of each path at times 0, 1, ..., horizon. (If the
+          states are unlabeled, the array has the smallest unsigned
+          integer dtype that can hold every state, e.g., uint8.)
+
+        Example:
+          X = MarkovChain([[.9, .1], [.5, .5]], [1, 0])
+          paths = X.sim(10000, horizon=100)
+          (paths[:, 100] == 1).mean()
+        """
+        if horizon is None:
+            return super().sim(n)
+        return self.prob_space.sim(n, horizon=horizon)
+
+    def distribution_at(self, n):
+        """Calculate the exact distribution of the state at time n.
+
+        Args:
+          n (int): the time
+
+        Returns:
+          Table: the probability of each state at time n, which
+            can be compared with X[n].sim(...).tabulate(normalize=True)
+        """
+        kernel = self.prob_space.kernel
+        return kernel.make_table(kernel.distribution_at(n))
+
+    def stationary_distribution(self):
+        """Calculate the stationary distribution.
+
+        For an irreducible chain, this is also the long-run
+        fraction of time spent in each state.
+
+        Returns:
+          Table: the stationary probability of each state
+        """
+        kernel = self.prob_space.kernel
+        return kernel.make_table(kernel.stationary_distribution())
 
-class ContinuousTimeMarkovChainResult(ContinuousTimeFunction,
-                                      DiscreteValued):
+    def hitting_times(self, targets):
+        """Calculate the expected number of steps to reach a set of states.
+
+        Args:
+          targets (list): the labels of the target states
+            (or a single label)
+
+        Returns:
+          Table: the expected hitting time, starting from each state
+        """
+        kernel = self.prob_space.kernel
+        labels = list(kernel.state_labels)
+        if not isinstance(targets, (list, tuple, set)):
+            targets = [targets]
+        codes = [labels.index(target) for target in targets]
+        return kernel.make_table(kernel.hitting_times(codes))
 
-    def __init__(self, states, rates,
-                 unscaled_interarrival_times,
-                 state_labels):
-        self.states = states
+    def long_run_fractions(self, steps):
+        """Estimate the long-run fraction of time spent in each state.
+
+        A single path is simulated a block at a time and only the
+        visit counts are kept, so memory does not grow with steps.
+
+        Args:
+          steps (int): the length of the path to simulate
+
+        Returns:
+          Table: the fraction of X_0, ..., X_{steps-1} in each state,
+            which can be compared with stationary_distribution()
+        """
+        kernel = self.prob_space.kernel
+        return kernel.make_table(kernel.occupancy(steps) / steps)
+
+    def transition_counts(self, steps):
+        """Count the transitions made by a single simulated path.
+
+        Args:
+          steps (int): the number of transitions to simulate
+
+        Returns:
+          An n x n array (a sparse matrix, if the transition matrix
+          is sparse) whose (i, j) entry counts the transitions from
+          the ith state to the jth state. Dividing each row by its sum
+          estimates the transition matrix.
+        """
+        return self.prob_space.kernel.transition_counts(steps)
+
+    def time_average(self, func, steps, batches=20):
+        """Estimate the long-run average of a function of the state.
+
+        Args:
+          func: a function of the state label
+          steps (int): the length of the path to simulate
+          batches (int): the number of batches used to estimate the
+            standard error (by the method of batch means)
+
+        Returns:
+          tuple: the average of func(X_0), ..., func(X_{steps-1})
+            and its estimated standard error
+
+        Example:
+          X = MarkovChain([[.9, .1], [.5, .5]], [1, 0])
+          mean, se = X.time_average(lambda x: x, 10 ** 6)
+        """
+        kernel = self.prob_space.kernel
+        values = [func(label) for label in kernel.state_labels]
+        return kernel.time_average(values, steps, batches)
+
+
+class ContinuousTimeMarkovChainResult(JumpFunction):
+
+    def __init__(self, kernel, rates):
+        # A continuous-time Markov chain is specified by the
+        # sequence of states of the embedded (jump) chain and the
+        # holding times, which are Exponential(rate of the state).
+        self.states = MarkovChainResult(kernel)
         self.rates = rates
-        self.times = unscaled_interarrival_times
-        self.state_labels = state_labels
+        self.state_labels = kernel.state_labels
+        super().__init__()
 
-        # Define an InfiniteVector of the interarrival times.
-        def interarrival_times(n):
-            for i in range(n + 1):
-                state = self.states[i]
-                interarrival_time = self.times[i] / self.rates[state]
-            return interarrival_time
-        self.interarrival_times = InfiniteVector(interarrival_times)
-
-        def _func(t):
-            total_time = 0
-            n = 0
-            while True:
-                state = self.states[n]
-                total_time += self.times[n] / self.rates[state]
-                if total_time > t:
-                    return self.state_labels[state]
-                n += 1
-        super().__init__(_func)
+    def _next_interarrival_times(self, start, size):
+        self.states._generate(start + size - 1)
+        rates = self.rates[self.states.states[start:start + size]]
+        # an absorbing state (with rate 0) is never left
+        with np.errstate(divide="ignore"):
+            return np.where(rates == 0, inf,
+                            np.random.exponential(size=size) / rates)
+
+    def _values(self, indexes):
+        self.states._generate(indexes.max())
+        codes = self.states.states[indexes]
+        return self.states.kernel.decode(codes).tolist()
 
 
 class ContinuousTimeMarkovChainProbabilitySpace(ProbabilitySpace):
 
+    # how many matrix exponentials exp(Q t) are cached
+    expm_cache_size = 8
+    # the most states for which exp(Q t) is computed as a dense matrix
+    max_dense_expm = 500
+
     def __init__(self, generator_matrix, initial_dist, state_labels=None):
         """Initialize a probability space for a continuous-time Markov chain.
 
         Args:
           generator_matrix: n x n generator matrix whose rows sum to 0
+            (either an array or a scipy.sparse matrix)
           initial_dist: length n vector of the initial distribution
           state_labels: length n vector of the labels of each state
                         (defaults to 0, 1, ..., n-1)
         """
 
-        # Check generator matrix
-        for i, row in enumerate(generator_matrix):
-            if abs(sum(row)) > EPS:
-                raise Exception("Rows of a generator matrix must sum to 0.")
-            for j, q in enumerate(row):
-                if j == i:
-                    if q > 0:
-                        raise Exception("Diagonal elements of a generator matrix " +
-                                        "cannot be positive.")
-                else:
-                    if q < 0:
-                        raise Exception("Off-diagonal elements of a generator matrix " +
-                                        "cannot be negative.")
         # Check that dimensions agree
-        self.generator_matrix = np.array(generator_matrix)
+        if sparse.issparse(generator_matrix):
+            self.generator_matrix = sparse.csr_matrix(generator_matrix,
+                                                      dtype=float)
+            self.generator_matrix.sum_duplicates()
+        else:
+            self.generator_matrix = np.array(generator_matrix, dtype=float)
         m, n = self.generator_matrix.shape
         if m != n:
             raise Exception("Transition matrix must be square.")
+        # Check generator matrix
+        rates = -self.generator_matrix.diagonal()
+        off_diagonal = self.generator_matrix - _diagonal_matrix(
+            -rates, self.generator_matrix)
+        row_sums = np.asarray(self.generator_matrix.sum(axis=1)).ravel()
+        if np.any(np.abs(row_sums) > n * EPS * np.maximum(1, rates)):
+            raise Exception("Rows of a generator matrix must sum to 0.")
+        if np.any(rates < 0):
+            raise Exception("Diagonal elements of a generator matrix " +
+                            "cannot be positive.")
+        if np.any((off_diagonal.data if sparse.issparse(off_diagonal)
+                   else off_diagonal) < 0):
+            raise Exception("Off-diagonal elements of a generator matrix " +
+                            "cannot be negative.")
         if len(initial_dist) != n:
             raise Exception("Initial distribution must be a vector whose "
                             "length matches the dimensions of the "
@@ -184,29 +749,168 @@ class ContinuousTimeMarkovChainProbabilitySpace(ProbabilitySpace):
         self.n_states = n
 
         # determine transition matrix
-        transition_matrix = []
-        for i, row in enumerate(self.generator_matrix):
-            rate = -row[i]
-            transition_matrix.append(
-                [p / rate if j != i else 0 for j, p in enumerate(row)]
-            )
-        self.transition_matrix = np.array(transition_matrix)
+        # (an absorbing state, with rate 0, transitions to itself)
+        absorbing = rates == 0
+        scale = np.where(absorbing, 0, 1 / np.where(absorbing, 1, rates))
+        self.transition_matrix = (
+            _diagonal_matrix(scale, off_diagonal) @ off_diagonal +
+            _diagonal_matrix(absorbing.astype(float), off_diagonal)
+        )
+        self.rates = rates
+
+        # Compile the embedded (jump) chain once for all paths.
+        self.kernel = compile_kernel(self.transition_matrix,
+                                     self.initial_dist,
+                                     state_labels)
+
+        # The uniformized chain is only compiled if it is needed.
+        self.uniform_rate = max(rates.max(), 0) or 1
+        self.uniformized_kernel = None
+        # the most recently used matrix exponentials exp(Q t), keyed by t
+        self.expm_cache = collections.OrderedDict()
 
-        # A continuous-time Markov chain is specified by the
-        # sequence of states and the unscaled interarrival times.
         def _draw():
-            states = MarkovChain(self.transition_matrix,
-                                 self.initial_dist).draw()
-            rates = -np.diag(self.generator_matrix)
-            unscaled_interarrival_times = (Exponential(1) ** inf).draw()
-            return ContinuousTimeMarkovChainResult(
-                states,
-                rates,
-                unscaled_interarrival_times,
-                self.state_labels)
+            return ContinuousTimeMarkovChainResult(self.kernel, self.rates)
 
         super().__init__(_draw)
 
+    def get_uniformized_kernel(self):
+        """Compile the uniformized chain, with transition matrix I + Q / r.
+
+        Here r (self.uniform_rate) is the largest rate of any state. The
+        continuous-time chain is the uniformized chain observed at the
+        arrival times of a Poisson process with rate r.
+        """
+        if self.uniformized_kernel is None:
+            Q = self.generator_matrix
+            off_diagonal = Q - _diagonal_matrix(Q.diagonal(), Q)
+            leaving = np.asarray(off_diagonal.sum(axis=1)).ravel()
+            # (The diagonal is computed from the off-diagonal entries,
+            #  so that the rows sum to 1 up to rounding error.)
+            stay = np.clip(1 - leaving / self.uniform_rate, 0, 1)
+            self.uniformized_kernel = compile_kernel(
+                off_diagonal / self.uniform_rate +
+                _diagonal_matrix(stay, Q),
+                self.initial_dist,
+                # (unlabeled states keep the compact state_dtype)
+                None if self.kernel.label_array is None
+                else self.state_labels)
+        return self.uniformized_kernel
+
+    def _advance(self, dist, t):
+        # dist exp(Q t), with exp(Q t) cached for small dense matrices
+        # (a sparse exponential would fill in, and a large dense one
+        #  would take O(n^3) time, so otherwise the product is computed
+        #  directly, with a few matrix-vector products).
+        if t == 0:
+            return dist
+        Q = self.generator_matrix
+        if sparse.issparse(Q):
+            return sparse_linalg.expm_multiply(Q.T.tocsr() * t, dist)
+        if self.n_states > self.max_dense_expm:
+            return sparse_linalg.expm_multiply(Q.T * t, dist)
+        # (the key is rounded to 10 significant digits, so that equally
+        #  spaced times, e.g., from np.linspace, share one exponential)
+        key = float("%.10g" % t)
+        if key in self.expm_cache:
+            self.expm_cache.move_to_end(key)
+        else:
+            self.expm_cache[key] = linalg.expm(Q * t)
+            if len(self.expm_cache) > self.expm_cache_size:
+                self.expm_cache.popitem(last=False)
+        return dist @ self.expm_cache[key]
+
+    def distribution_at(self, times):
+        """Calculate the exact distribution of the state at given times.
+
+        The times are sorted, and the distribution is advanced from
+        each time to the next by the matrix exponential of Q times the
+        gap. For an equally spaced grid, only one exponential is needed.
+
+        Args:
+          times (list): the times (non-negative numbers)
+
+        Returns:
+          np.ndarray: a len(times) x n array whose ith row is the
+            probability of each state at the ith time
+        """
+        times = np.asarray(times, dtype=float)
+        if times.ndim != 1 or np.any(times < 0):
+            raise Exception("times must be a vector of non-negative times.")
+        dists = np.empty((len(times), self.n_states))
+        dist = np.asarray(self.initial_dist, dtype=float)
+        last = 0
+        for i in np.argsort(times, kind="stable"):
+            dist = self._advance(dist, times[i] - last)
+            dists[i] = dist
+            last = times[i]
+        return dists
+
+    def stationary_distribution(self):
+        """Calculate the stationary distribution.
+
+        Solves pi Q = 0, with the entries of pi summing to 1.
+
+        Returns:
+          np.ndarray: the stationary probability of each state
+        """
+        return self.kernel._solve_balance(self.generator_matrix.T)
+
+    def hitting_times(self, targets):
+        """Calculate the expected time to reach a set of states.
+
+        Args:
+          targets (list): the integer codes of the target states
+
+        Returns:
+          np.ndarray: the expected hitting time from each state
+            (0 for the target states themselves)
+        """
+        others = np.setdiff1d(np.arange(self.n_states), targets)
+        A = -self.generator_matrix[others, :][:, others]
+        times = np.zeros(self.n_states)
+        try:
+            times[others] = self.kernel._solve(A, np.ones(len(others)))
+        except np.linalg.LinAlgError:
+            raise Exception("The target states cannot be reached "
+                            "from every state.")
+        return times
+
+    def sim(self, n, times=None):
+        """Simulate n draws from the probability space.
+
+        Args:
+          n (int): How many draws to make.
+          times (list): If specified, the n paths are simulated
+            together (by uniformization) at the given times, and an
+            n x len(times) array of states is returned instead.
+
+        Returns:
+          Results (or an array): the simulation results.
+        """
+        if times is None:
+            return super().sim(n)
+        times = np.asarray(times, dtype=float)
+        if times.ndim != 1 or np.any(times < 0):
+            raise Exception("times must be a vector of non-negative times.")
+        kernel = self.get_uniformized_kernel()
+        states = np.empty((len(times), n), dtype=kernel.state_dtype)
+        current = kernel.initial_states(n)
+        last = 0
+        # Go through the times in increasing order, making a Poisson
+        # number of (candidate) jumps in each path between them.
+        for i in np.argsort(times, kind="stable"):
+            jumps = np.random.poisson(self.uniform_rate * (times[i] - last),
+                                      size=n)
+            active = np.flatnonzero(jumps)
+            while len(active) > 0:
+                current[active] = kernel.next_states(current[active])
+                jumps[active] -= 1
+                active = active[jumps[active] > 0]
+            states[i] = current
+            last = times[i]
+        return kernel.decode(np.ascontiguousarray(states.T))
+
 
 class ContinuousTimeMarkovChain(RV):
 
@@ -225,3 +929,90 @@ class ContinuousTimeMarkovChain(RV):
             initial_dist,
             state_labels)
         super().__init__(prob_space)
+
+    def sim(self, n, times=None):
+        """Simulate n paths of the continuous-time Markov chain.
+
+        Args:
+          n (int): How many paths to simulate.
+          times (list): If specified, all n paths are simulated at
+            once, by uniformization, and only observed at these times.
+
+        Returns:
+          RVResults: the n (lazily generated) paths, if times is None.
+          Otherwise, an n x len(times) array whose rows are the
+          states of each path at the given times.
+
+        Example:
+          X = ContinuousTimeMarkovChain([[-1, 1], [2, -2]], [1, 0])
+          paths = X.sim(10000, times=np.linspace(0, 10, 101))
+          (paths[:, -1] == 1).mean()
+        """
+        if times is None:
+            return super().sim(n)
+        return self.prob_space.sim(n, times=times)
+
+    def distribution_at(self, t):
+        """Calculate the exact distribution of the state at time t.
+
+        Args:
+          t: a time, or a list of times
+
+        Returns:
+          Table: the probability of each state at time t. (If t is a
+            list, a len(t) x n array is returned instead, whose ith row
+            is the distribution at the ith time, in the order of the
+            states.)
+
+        Example:
+          X = ContinuousTimeMarkovChain([[-1, 1], [2, -2]], [1, 0])
+          X.distribution_at(np.linspace(0, 10, 1001))
+        """
+        if is_numeric_vector(t):
+            return self.prob_space.distribution_at(t)
+        return self.prob_space.kernel.make_table(
+            self.prob_space.distribution_at([t])[0])
+
+    def stationary_distribution(self):
+        """Calculate the stationary distribution.
+
+        For an irreducible chain, this is also the long-run
+        fraction of time spent in each state.
+
+        Returns:
+          Table: the stationary probability of each state
+        """
+        return self.prob_space.kernel.make_table(
+            self.prob_space.stationary_distribution())
+
+    def hitting_times(self, targets):
+        """Calculate the expected time to reach a set of states.
+
+        Args:
+          targets (list): the labels of the target states
+            (or a single label)
+
+        Returns:
+          Table: the expected hitting time, starting from each state
+        """
+        kernel = self.prob_space.kernel
+        labels = list(kernel.state_labels)
+        if not isinstance(targets, (list, tuple, set)):
+            targets = [targets]
+        codes = [labels.index(target) for target in targets]
+        return kernel.make_table(self.prob_space.hitting_times(codes))
+
+    def absorption_times(self):
+        """Calculate the expected time until absorption.
+
+        A state is absorbing if its rate is 0, i.e., if it is never left.
+
+        Returns:
+          Table: the expected time to reach an absorbing state,
+            starting from each state
+        """
+        absorbing = np.flatnonzero(self.prob_space.rates == 0)
+        if len(absorbing) == 0:
+            raise Exception("The Markov chain has no absorbing states.")
+        return self.prob_space.kernel.make_table(
+            self.prob_space.hitting_times(absorbing))
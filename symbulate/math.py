@@ -53,6 +53,15 @@ def mean(x):
 def cumsum(x):
     return x.cumsum()
 
+def cumprod(x):
+    return x.cumprod()
+
+def cummax(x):
+    return x.cummax()
+
+def cummin(x):
+    return x.cummin()
+
 def var(x):
     return mean([(i - mean(x)) ** 2 for i in x])
 
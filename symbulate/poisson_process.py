@@ -1,29 +1,209 @@
-from .distributions import Exponential
-from .math import inf
+import numbers
+
+import numpy as np
+
 from .probability_space import ProbabilitySpace
 from .result import (
     InfiniteVector,
-    ContinuousTimeFunction,
-    DiscreteValued
+    JumpFunction
 )
 from .random_variables import RV
 from .random_processes import RandomProcess
 
 
-class PoissonProcessResult(ContinuousTimeFunction,
-                           DiscreteValued):
+class ConstantRate:
+    """The rate of a (homogeneous) Poisson process.
+
+    A rate can generate the arrival times after a given time and
+    count the arrivals of many paths at once. Rates whose integral
+    can be inverted also define integral(t) and inverse(s), so that
+    arrivals are generated by transforming a Poisson process with
+    rate 1.
+    """
+
+    def __init__(self, rate):
+        if not rate > 0:
+            raise Exception("The rate of a Poisson process must be positive.")
+        self.rate = rate
+
+    def integral(self, t):
+        return self.rate * np.asarray(t, dtype=float)
+
+    def inverse(self, s):
+        return np.asarray(s, dtype=float) / self.rate
+
+    def arrivals_after(self, horizon, size):
+        """Return about size arrival times after horizon, and the
+        time up to which they are all of the arrivals."""
+        s = self.integral(horizon) + np.cumsum(np.random.exponential(size=size))
+        times = self.inverse(s)
+        return times, times[-1]
+
+    def counts(self, n, times):
+        """Simulate the counts of n paths at the (sorted) times.
+
+        Returns:
+          An n x len(times) array of counts.
+        """
+        # The number of arrivals of a Poisson process by time t is the
+        # number of arrivals of a Poisson process with rate 1 by time
+        # integral(t).
+        unit_times = self.integral(times)
+        m = len(times)
+        horizon = unit_times[-1] if m > 0 else 0
+        if horizon > m:
+            # With many arrivals per time, it is faster to draw the
+            # counts in the gaps between the times, which are
+            # independent Poisson random variables.
+            gaps = np.diff(unit_times, prepend=0)
+            return np.cumsum(np.random.poisson(gaps, size=(n, m)), axis=1)
+        # Given the total number of arrivals by the last time, the
+        # arrival times are independent Uniform(0, horizon).
+        totals = np.random.poisson(horizon, size=n)
+        arrivals = np.random.uniform(0, horizon, size=totals.sum())
+        return _bin_arrivals(n, unit_times, totals, arrivals)
+
+
+class PiecewiseRate(ConstantRate):
+    """A piecewise-constant rate, which can repeat with a period.
+
+    Args:
+      rates (dict): the rate starting at each time, e.g.,
+        {0: 1, 8: 3, 18: 2} for a rate of 1 on [0, 8), 3 on [8, 18)
+        and 2 after 18 (or until the end of the period)
+      period (float): if specified, the rates repeat with this period
+    """
+
+    def __init__(self, rates, period=None):
+        self.starts = np.array(sorted(rates), dtype=float)
+        self.rates = np.array([rates[start] for start in sorted(rates)],
+                              dtype=float)
+        if len(self.starts) == 0 or self.starts[0] != 0:
+            raise Exception("A piecewise rate must start at time 0.")
+        if np.any(self.rates < 0) or not np.any(self.rates > 0):
+            raise Exception("Rates cannot be negative, and must not "
+                            "all be 0.")
+        if period is not None and not period > self.starts[-1]:
+            raise Exception("The period must be after the start of "
+                            "the last rate.")
+        self.period = period
+        # the integral of the rate up to each start time
+        self.cum_starts = np.concatenate(
+            ([0], np.cumsum(np.diff(self.starts) * self.rates[:-1])))
+        if period is not None:
+            self.cum_period = (self.cum_starts[-1] +
+                               (period - self.starts[-1]) * self.rates[-1])
+
+    def integral(self, t):
+        t = np.asarray(t, dtype=float)
+        cycles = 0
+        if self.period is not None:
+            cycles, t = np.divmod(t, self.period)
+        i = np.searchsorted(self.starts, t, side="right") - 1
+        total = self.cum_starts[i] + self.rates[i] * (t - self.starts[i])
+        if self.period is not None:
+            total = total + cycles * self.cum_period
+        return total
+
+    def inverse(self, s):
+        s = np.asarray(s, dtype=float)
+        cycles = 0
+        if self.period is not None:
+            cycles, s = np.divmod(s, self.cum_period)
+        # (Searching to the right skips the pieces with rate 0, since
+        #  the integral does not increase over them.)
+        i = np.searchsorted(self.cum_starts, s, side="right") - 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = self.starts[i] + (s - self.cum_starts[i]) / self.rates[i]
+        if self.period is not None:
+            t = t + cycles * self.period
+        else:
+            # after the last start time, the last rate continues forever
+            t = np.where(np.isnan(t), np.inf, t)
+        return t
+
+
+class ThinnedRate:
+    """A time-varying rate, bounded by rate_max, sampled by thinning.
+
+    Candidate arrivals are generated at rate rate_max, and a candidate
+    at time t is kept with probability rate(t) / rate_max.
+
+    Args:
+      rate: a function of time that returns the rate; it is called
+        on numpy arrays of times, so it should be vectorized
+        (e.g., lambda t: 2 + np.sin(t))
+      rate_max (float): an upper bound on the rate
+    """
+
+    def __init__(self, rate, rate_max):
+        if rate_max is None or not rate_max > 0:
+            raise Exception("rate_max must be a positive upper bound "
+                            "for a time-varying rate.")
+        self.rate = rate
+        self.rate_max = rate_max
+
+    def _keep(self, times):
+        rates = np.broadcast_to(
+            np.asarray(self.rate(times), dtype=float), times.shape)
+        if np.any(rates > self.rate_max) or np.any(rates < 0):
+            raise Exception("The rate must be between 0 and rate_max.")
+        return np.random.random_sample(times.shape) * self.rate_max < rates
+
+    def arrivals_after(self, horizon, size):
+        candidates = horizon + np.cumsum(
+            np.random.exponential(1 / self.rate_max, size=size))
+        return candidates[self._keep(candidates)], candidates[-1]
+
+    def counts(self, n, times):
+        m = len(times)
+        horizon = times[-1] if m > 0 else 0
+        totals = np.random.poisson(self.rate_max * horizon, size=n)
+        candidates = np.random.uniform(0, horizon, size=totals.sum())
+        keep = self._keep(candidates)
+        paths = np.repeat(np.arange(n), totals)
+        return _bin_arrivals(n, times, np.bincount(paths[keep], minlength=n),
+                             candidates[keep])
+
+
+def _bin_arrivals(n, times, totals, arrivals):
+    # Count the arrivals of each of n paths at each of the sorted
+    # times. The arrivals are listed path by path (totals[i] of them
+    # for the ith path), and each one adds to the count at the first
+    # time after it.
+    m = len(times)
+    paths = np.repeat(np.arange(n), totals)
+    first = np.searchsorted(times, arrivals)
+    increments = np.bincount(paths * m + first,
+                             minlength=n * m).reshape(n, m)
+    return np.cumsum(increments, axis=1)
 
-    def __init__(self, interarrival_times):
-        self.interarrival_times = interarrival_times
 
-        def func(t):
-            total_time = 0
-            for n, time in enumerate(self.interarrival_times):
-                total_time += time
-                if t < total_time:
-                    return n
+def make_rate(rate, rate_max=None, period=None):
+    """Interpret the rate of a Poisson process."""
+    if isinstance(rate, numbers.Number):
+        return ConstantRate(rate)
+    elif isinstance(rate, dict):
+        return PiecewiseRate(rate, period)
+    elif callable(rate):
+        return ThinnedRate(rate, rate_max)
+    raise Exception("The rate of a Poisson process must be a number, "
+                    "a dict of piecewise-constant rates, or a function.")
 
-        super().__init__(func)
+
+class PoissonProcessResult(JumpFunction):
+
+    def __init__(self, rate):
+        self.rate = rate
+        super().__init__()
+
+    def _next_arrival_times(self, start, size):
+        times, self.horizon = self.rate.arrivals_after(self.horizon, size)
+        return times
+
+    def _values(self, indexes):
+        # The count at a time is the number of arrivals before it.
+        return indexes.tolist()
 
     def get_states(self):
         return InfiniteVector(lambda n: n)
@@ -31,30 +211,90 @@ class PoissonProcessResult(ContinuousTimeFunction,
 
 class PoissonProcessProbabilitySpace(ProbabilitySpace):
 
-    def __init__(self, rate):
+    def __init__(self, rate, rate_max=None, period=None):
         """Initialize probability space for a Poisson process.
 
         Args:
-          rate: rate of the Poisson process
+          rate: rate of the Poisson process (see PoissonProcess)
+          rate_max: an upper bound on the rate, if it is a function
+          period: the period of a piecewise-constant rate, if any
         """
-        self.rate = rate
+        self.rate = make_rate(rate, rate_max, period)
 
         def draw():
-            interarrival_times = (Exponential(rate=self.rate) ** inf).draw()
-            return PoissonProcessResult(interarrival_times)
+            return PoissonProcessResult(self.rate)
 
         super().__init__(draw)
 
+    def sim(self, n, times=None):
+        """Simulate n draws from the probability space.
+
+        Args:
+          n (int): How many draws to make.
+          times (list): If specified, only the counts at these times
+            are simulated, for all n paths at once, and an
+            n x len(times) array of counts is returned instead.
+
+        Returns:
+          Results (or an array): the simulation results.
+        """
+        if times is None:
+            return super().sim(n)
+        times = np.asarray(times, dtype=float)
+        if times.ndim != 1 or np.any(times < 0):
+            raise Exception("times must be a vector of non-negative times.")
+        order = np.argsort(times, kind="stable")
+        counts = self.rate.counts(n, times[order])
+        if np.any(np.diff(order) < 0):
+            # put the counts back in the original order of the times
+            counts[:, order] = counts.copy()
+        return counts
+
 
 class PoissonProcess(RandomProcess, RV):
 
-    def __init__(self, rate):
+    def __init__(self, rate, rate_max=None, period=None):
         """Initialize a Poisson process.
 
         Args:
-          rate: rate of the Poisson process
+          rate: rate of the Poisson process, which can be
+            - a number, for a homogeneous Poisson process,
+            - a dict of piecewise-constant rates, e.g., {0: 1, 8: 3}
+              for a rate of 1 on [0, 8) and 3 after that, or
+            - a (vectorized) function of time, e.g.,
+              lambda t: 2 + np.sin(t), in which case rate_max must
+              also be specified
+          rate_max: an upper bound on the rate, if it is a function
+          period: the period of a piecewise-constant rate, if it
+            repeats (e.g., 24 for a daily pattern over hours)
+
+        Example:
+          # traffic with a daily cycle, with time in hours
+          N = PoissonProcess({0: 10, 8: 60, 18: 30}, period=24)
         """
         self.rate = rate
-        prob_space = PoissonProcessProbabilitySpace(self.rate)
+        prob_space = PoissonProcessProbabilitySpace(rate, rate_max, period)
         RandomProcess.__init__(self, prob_space)
         RV.__init__(self, prob_space)
+
+    def sim(self, n, times=None):
+        """Simulate n paths of the Poisson process.
+
+        Args:
+          n (int): How many paths to simulate.
+          times (list): If specified, all n paths are simulated at
+            once, and only the counts at these times are returned.
+
+        Returns:
+          RVResults: the n (lazily generated) paths, if times is None.
+          Otherwise, an n x len(times) array whose rows are the
+          counts of each path at the given times.
+
+        Example:
+          N = PoissonProcess(rate=2)
+          counts = N.sim(10000, times=np.linspace(0, 10, 101))
+          counts[:, -1].mean()
+        """
+        if times is None:
+            return super().sim(n)
+        return self.prob_space.sim(n, times=times)
@@ -2,7 +2,43 @@ import numpy as np
 
 from .base import Logical
 from .result import Vector, InfiniteVector, join
-from .results import Results
+from .results import Results, RVResults
+from .sampling import AliasTable
+
+
+def _identity(x):
+    return x
+
+
+def _compose(func, projection):
+    # func, applied to outcomes mapped by projection
+    if projection is _identity:
+        return func
+    return lambda outcome: func(projection(outcome))
+
+
+def _common_space(space1, space2):
+    # Returns the probability space that outcomes of both space1 and
+    # space2 can be recovered from (one of the two), and the functions
+    # that map its outcomes to outcomes of space1 and space2.
+    if space1 == space2:
+        return space1, _identity, _identity
+    projection = space1._projection(space2)
+    if projection is not None:
+        return space1, _identity, projection
+    projection = space2._projection(space1)
+    if projection is not None:
+        return space2, projection, _identity
+    raise Exception("Events must be defined on same probability space.")
+
+
+def _align(x, y):
+    # Returns a common probability space for two RVs or Events, and
+    # the functions of its outcomes that define each of them.
+    prob_space, projection1, projection2 = _common_space(x.prob_space,
+                                                         y.prob_space)
+    return (prob_space, _compose(x.func, projection1),
+            _compose(y.func, projection2))
 
 
 class ProbabilitySpace:
@@ -25,11 +61,31 @@ class ProbabilitySpace:
         Returns:
           Results: A list-like object containing the simulation results.
         """
-        return Results(self.draw() for _ in range(n))
+        return Results(self.draws(n))
+
+    def draws(self, n):
+        """Draw n outcomes from the probability space.
+
+        Subclasses that can simulate many outcomes at once
+        (e.g., with a single vectorized call) should override
+        this method.
+
+        Args:
+          n (int): How many draws to make.
+
+        Returns:
+          list: The n outcomes.
+        """
+        return [self.draw() for _ in range(n)]
 
     def check_same(self, other):
-        if self != other:
-            raise Exception("Events must be defined on same probability space.")
+        _common_space(self, other)
+
+    def _projection(self, other):
+        # A function that maps each outcome of this probability space
+        # to an outcome of other, if this space extends other (e.g.,
+        # with draws from a hierarchical distribution); otherwise None.
+        return _identity if self == other else None
 
     def apply(self, func):
         """Define a new probability space.
@@ -58,15 +114,25 @@ class ProbabilitySpace:
                 return InfiniteVector(_func)
         else:
             def draw():
-                return Vector(self.draw() for _ in range(exponent))
+                return Vector(self.draws(exponent))
         return ProbabilitySpace(draw)
 
 
 class Event(Logical):
+    """Defines an event on a probability space.
+
+    Attributes:
+      prob_space (ProbabilitySpace): the underlying probability space
+      func (function): a function that maps outcomes to booleans
+      interval (tuple): if the event is of the form {a < outcome < b},
+        the pair (a, b); otherwise, None. (This is used to sample
+        conditional distributions exactly when possible.)
+    """
 
-    def __init__(self, prob_space, func):
+    def __init__(self, prob_space, func, interval=None):
         self.prob_space = prob_space
         self.func = func
+        self.interval = interval
 
     def check_same_prob_space(self, other):
         self.prob_space.check_same(other.prob_space)
@@ -81,19 +147,30 @@ class Event(Logical):
                 return Event(self.prob_space,
                              lambda outcome: op(self.func(outcome)))
             else:
-                if isinstance(other, Event):
-                    self.check_same_prob_space(other)
-                else:
+                if not isinstance(other, Event):
                     raise TypeError(
                         "Logical operations are only defined "
                         "between two Events, not between an Event "
                         "and a %s." % type(other).__name__)
-                return Event(self.prob_space,
-                             lambda outcome: op(self.func(outcome),
-                                                other.func(outcome)))
+                prob_space, func1, func2 = _align(self, other)
+                return Event(prob_space,
+                             lambda outcome: op(func1(outcome),
+                                                func2(outcome)))
 
         return _op_func
 
+    # The intersection of two intervals is again an interval,
+    # e.g., (X > 2) & (X < 5).
+    def __and__(self, other):
+        event = super().__and__(other)
+        if (isinstance(other, Event) and
+            self.prob_space == other.prob_space and
+            self.interval is not None and
+            other.interval is not None):
+            event.interval = (max(self.interval[0], other.interval[0]),
+                              min(self.interval[1], other.interval[1]))
+        return event
+
     # This prevents users from writing expressions like 2 < X < 5,
     # which evaluate to ((2 < X) and (X < 5)). This unfortunately
     # is not well-defined in Python and cannot be overloaded.
@@ -107,7 +184,8 @@ class Event(Logical):
         return self.func(self.prob_space.draw())
 
     def sim(self, n):
-        return Results(self.draw() for _ in range(n))
+        return Results(self.func(outcome)
+                       for outcome in self.prob_space.draws(n))
 
 
 class BoxModel(ProbabilitySpace):
@@ -117,7 +195,8 @@ class BoxModel(ProbabilitySpace):
       box (list-like or dict-like): The box to sample from.
         The box can be specified either directly as a list
         of objects or indirectly as a dict of objects and
-        their counts.
+        their counts (or their relative frequencies, as in
+        the Table returned by .tabulate()).
       size (int): How many draws to make.
       replace (bool-like): Sample with replacement or without?
       probs (list): Probabilities of sampling each ticket
@@ -133,11 +212,26 @@ class BoxModel(ProbabilitySpace):
         if isinstance(box, list):
             self.box = box
             self.probs = probs
+            if probs is not None and abs(np.sum(probs) - 1) > 1e-8:
+                raise Exception("Probabilities must sum to 1.")
         elif isinstance(box, dict):
-            self.box = []
-            for ticket, count in box.items():
-                self.box.extend([ticket] * count)
-            self.probs = None
+            # When drawing with replacement, there is no need to
+            # expand the counts into individual tickets: sampling
+            # each distinct ticket in proportion to its count is
+            # equivalent.
+            if replace:
+                self.box = list(box.keys())
+                self.probs = list(box.values())
+            else:
+                self.box = []
+                for ticket, count in box.items():
+                    if not float(count).is_integer():
+                        raise Exception(
+                            "Counts must be integers when drawing "
+                            "without replacement."
+                        )
+                    self.box.extend([ticket] * int(count))
+                self.probs = None
         else:
             raise Exception(
                 "Box must be specified either as a list or a dict."
@@ -156,6 +250,32 @@ class BoxModel(ProbabilitySpace):
                 "than there are tickets in the box."
             )
 
+        # Build the alias table once, so that each weighted draw
+        # (with replacement) takes constant time.
+        if self.probs is not None:
+            if len(self.probs) != len(self.box):
+                raise Exception(
+                    "There must be as many probabilities as "
+                    "there are tickets in the box."
+                )
+            self.alias_table = AliasTable(self.probs)
+        else:
+            self.alias_table = None
+
+    def _draw_inds(self, size, replace):
+        if not replace:
+            return np.random.choice(len(self.box), size, False, self.probs)
+        elif self.alias_table is not None:
+            return self.alias_table.sample(size)
+        else:
+            return np.random.randint(len(self.box), size=size)
+
+    def _make_output(self, inds):
+        draws = [self.box[i] for i in inds]
+        if not self.order_matters:
+            draws.sort()
+        return self.output_type(draws)
+
     def draw(self):
         """
         A function that takes no arguments and returns a value(s) from the
@@ -170,20 +290,155 @@ class BoxModel(ProbabilitySpace):
             with the specified probabilities.
         """
 
-        def draw_inds(size):
-            return np.random.choice(len(self.box), size, self.replace, self.probs)
-
         if self.size is None:
-            return self.box[draw_inds(None)]
+            return self.box[self._draw_inds(None, True)]
         elif self.size == float("inf"):
             def _func(_):
-                return self.box[draw_inds(None)]
+                return self.box[self._draw_inds(None, True)]
             return self.infinite_output_type(_func)
         else:
-            draws = [self.box[i] for i in draw_inds(self.size)]
-            if not self.order_matters:
-                draws.sort()
-            return self.output_type(draws)
+            return self._make_output(self._draw_inds(self.size, self.replace))
+
+    def draws(self, n):
+        """Draw n outcomes from the box model.
+
+        When every outcome consists of draws with replacement,
+        the indexes for all n outcomes are sampled at once.
+
+        Args:
+          n (int): How many draws to make.
+
+        Returns:
+          list: The n outcomes.
+        """
+        if self.size is None:
+            return [self.box[i] for i in self._draw_inds(n, True)]
+        elif self.replace and self.size != float("inf"):
+            inds = self._draw_inds((n, self.size), True)
+            return [self._make_output(row) for row in inds]
+        return super().draws(n)
+
+
+class Empirical(ProbabilitySpace):
+    """Defines a probability space from observed or simulated data.
+
+    Each draw is one of the data values, chosen at random (in
+    proportion to its count, if the data is a Table). This makes
+    it cheap to reuse the output of one simulation as an input
+    to another, e.g., for the bootstrap.
+
+    Attributes:
+      data (RVResults, Table, or array-like): The data to sample
+        from. An RVResults object shares its underlying array
+        with the probability space instead of copying it. A
+        Table (or dict) maps each value to its count or relative
+        frequency.
+      values (np.ndarray or list): The distinct values (for a
+        Table) or the data values (otherwise).
+      probs (np.ndarray): The probability of each entry of values.
+    """
+
+    def __init__(self, data):
+        if isinstance(data, dict):
+            self.values = list(data.keys())
+            self.alias_table = AliasTable(list(data.values()))
+            self.probs = self.alias_table.probs
+        else:
+            if isinstance(data, RVResults):
+                data._set_array()
+                self.values = data.array
+            else:
+                self.values = np.asarray(data)
+            if len(self.values) == 0:
+                raise Exception("Cannot sample from empty data.")
+            self.alias_table = None
+            self.probs = np.full(len(self.values), 1 / len(self.values))
+
+    def _draw_inds(self, size):
+        if self.alias_table is not None:
+            return self.alias_table.sample(size)
+        return np.random.randint(len(self.values), size=size)
+
+    def _get_value(self, i):
+        value = self.values[i]
+        if isinstance(value, np.ndarray):
+            return Vector(value)
+        return value
+
+    def draw(self):
+        """A function that takes no arguments and returns a
+          single value from the data."""
+        return self._get_value(self._draw_inds(None))
+
+    def draws(self, n):
+        """Draw n values from the data with replacement.
+
+        Args:
+          n (int): How many draws to make.
+
+        Returns:
+          list: The n values.
+        """
+        return [self._get_value(i) for i in self._draw_inds(n)]
+
+    def _set_sorted(self):
+        # check if it has already been set
+        if hasattr(self, "sorted_values"):
+            return
+        values = np.asarray(self.values)
+        if values.ndim != 1:
+            raise Exception(
+                "The pdf, cdf, and quantile are only defined for "
+                "one-dimensional data.")
+        order = np.argsort(values, kind="mergesort")
+        self.sorted_values = values[order]
+        if self.alias_table is None:
+            # (counts / n, so that the proportions are exact)
+            self.cum_probs = np.arange(1, len(values) + 1) / len(values)
+        else:
+            self.cum_probs = np.cumsum(self.probs[order])
+
+    def cdf(self, x):
+        """Calculate the empirical cdf P(X <= x).
+
+        Args:
+          x: a number or an array of numbers
+
+        Returns:
+          The proportion of the data less than or equal to x.
+        """
+        self._set_sorted()
+        i = np.searchsorted(self.sorted_values, x, side="right")
+        cum_probs = np.concatenate(([0.], self.cum_probs))
+        return cum_probs[i]
+
+    def pdf(self, x):
+        """Calculate the empirical pmf P(X = x).
+
+        Args:
+          x: a number or an array of numbers
+
+        Returns:
+          The proportion of the data equal to x.
+        """
+        self._set_sorted()
+        cum_probs = np.concatenate(([0.], self.cum_probs))
+        upper = np.searchsorted(self.sorted_values, x, side="right")
+        lower = np.searchsorted(self.sorted_values, x, side="left")
+        return cum_probs[upper] - cum_probs[lower]
+
+    def quantile(self, q):
+        """Calculate the empirical quantile function.
+
+        Args:
+          q: a number or an array of numbers between 0 and 1
+
+        Returns:
+          The smallest data value x such that P(X <= x) >= q.
+        """
+        self._set_sorted()
+        i = np.searchsorted(self.cum_probs, q, side="left")
+        return self.sorted_values[np.minimum(i, len(self.sorted_values) - 1)]
 
 
 class DeckOfCards(BoxModel):
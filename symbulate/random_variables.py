@@ -1,8 +1,25 @@
+import numbers
+import operator
+
 from .base import Arithmetic, Transformable, Comparable
-from .probability_space import Event
+from .probability_space import Event, _align, _identity
 from .result import Vector, join, is_scalar, is_numeric_vector
 from .results import RVResults
 
+
+def _get_interval(op, value):
+    # Returns the interval {x : op(x, value)}, or None if that set is
+    # not an interval. Endpoints are not distinguished, so this should
+    # only be used for continuous random variables.
+    if not isinstance(value, numbers.Real):
+        return None
+    if op in (operator.lt, operator.le):
+        return (-float("inf"), value)
+    elif op in (operator.gt, operator.ge):
+        return (value, float("inf"))
+    return None
+
+
 class RV(Arithmetic, Transformable, Comparable):
     """Defines a random variable.
 
@@ -44,7 +61,7 @@ class RV(Arithmetic, Transformable, Comparable):
       Z = RV(P, min)
     """
 
-    def __init__(self, prob_space, func=lambda x: x):
+    def __init__(self, prob_space, func=_identity):
         self.prob_space = prob_space
         self.func = func
 
@@ -69,7 +86,8 @@ class RV(Arithmetic, Transformable, Comparable):
           RVResults: A list-like object containing the simulation results.
         """
 
-        return RVResults(self.draw() for _ in range(n))
+        return RVResults(self.func(outcome)
+                         for outcome in self.prob_space.draws(n))
 
     def __call__(self, outcome):
         print("Warning: Calling an RV as a function simply applies the "
@@ -146,10 +164,10 @@ class RV(Arithmetic, Transformable, Comparable):
         def _op_func(self, other):
             # operations between this RV and another RV
             if isinstance(other, RV):
-                self.check_same_prob_space(other)
+                prob_space, func1, func2 = _align(self, other)
                 def _func(outcome):
-                    return op(self.func(outcome), other.func(outcome))
-                return RV(self.prob_space, _func)
+                    return op(func1(outcome), func2(outcome))
+                return RV(prob_space, _func)
             # operations between this RV and a scalar
             return self.apply(lambda x: op(x, other))
 
@@ -162,12 +180,17 @@ class RV(Arithmetic, Transformable, Comparable):
 
         def _op_func(self, other):
             if is_scalar(other):
+                # Keep track of intervals on the outcome itself, so that
+                # conditioning on them can be done without rejection.
+                interval = (_get_interval(op, other)
+                            if self.func is _identity else None)
                 return Event(self.prob_space,
-                             lambda x: op(self.func(x), other))
+                             lambda x: op(self.func(x), other),
+                             interval)
             elif isinstance(other, RV):
-                self.check_same_prob_space(other)
-                return Event(self.prob_space,
-                             lambda x: op(self.func(x), other.func(x)))
+                prob_space, func1, func2 = _align(self, other)
+                return Event(prob_space,
+                             lambda x: op(func1(x), func2(x)))
             raise NotImplementedError(
                 "Comparisons are only defined between two RVs or "
                 "between an RV and a scalar."
@@ -178,10 +201,11 @@ class RV(Arithmetic, Transformable, Comparable):
 
     # Define a joint distribution of two random variables: e.g., X & Y
     def __and__(self, other):
-        self.check_same_prob_space(other)
         if isinstance(other, RV):
+            prob_space, func1, func2 = _align(self, other)
             def _func(outcome):
-                return join(self.func(outcome), other.func(outcome))
+                return join(func1(outcome), func2(outcome))
+            return RV(prob_space, _func)
         elif is_scalar(other):
             def _func(outcome):
                 return join(self.func(outcome), other)
@@ -201,10 +225,16 @@ class RV(Arithmetic, Transformable, Comparable):
     def __or__(self, condition_event):
         # Check that the random variable and event are
         # defined on the same probability space.
-        self.check_same_prob_space(condition_event)
         if isinstance(condition_event, Event):
-            return RVConditional(self, condition_event)
+            prob_space, func, event_func = _align(self, condition_event)
+            random_variable = self
+            if prob_space != self.prob_space:
+                random_variable = RV(prob_space, func)
+            if prob_space != condition_event.prob_space:
+                condition_event = Event(prob_space, event_func)
+            return RVConditional(random_variable, condition_event)
         else:
+            self.check_same_prob_space(condition_event)
             raise NotImplementedError
 
 
@@ -227,12 +257,28 @@ class RVConditional(RV):
     Examples:
       X, Y = RV(Binomial(10, 0.4) ** 2)
       (X | (X + Y == 5)).draw() # returns a value between 0 and 5.
+
+    When the random variable has a named continuous distribution and
+    the event is an interval, e.g., X | (X > 3) with X = RV(Normal(0, 1)),
+    the conditional distribution is sampled exactly by inverting the cdf,
+    instead of by rejection.
     """
 
     def __init__(self, random_variable, condition_event):
         self.condition_event = condition_event
         super().__init__(random_variable.prob_space,
                          random_variable.func)
+        # Determine whether the conditional distribution can be
+        # sampled directly as a truncated distribution.
+        self.truncated = None
+        if (self.func is _identity and
+            condition_event.interval is not None and
+            hasattr(self.prob_space, "truncate") and
+            hasattr(self.prob_space, "cdf") and
+            self.prob_space.discrete is False and
+            not getattr(self.prob_space, "batch_shape", ())):
+            self.truncated = self.prob_space.truncate(
+                *condition_event.interval)
 
     def draw(self):
         """A function that takes no arguments and returns a value from
@@ -242,7 +288,31 @@ class RVConditional(RV):
           X, Y = RV(Binomial(10, 0.4) ** 2)
           (X | (X + Y == 5)).draw() might return a value of 4, for example.
         """
+        if self.truncated is not None:
+            return self.truncated.draw()
         while True:
             outcome = self.prob_space.draw()
             if self.condition_event.func(outcome):
                 return self.func(outcome)
+
+    def sim(self, n):
+        """Simulate n draws from the conditional distribution of the
+          random variable.
+
+        Outcomes are drawn from the probability space in batches, and
+        only those outcomes that satisfy the condition are kept.
+
+        Args:
+          n (int): How many draws to make.
+
+        Returns:
+          RVResults: A list-like object containing the simulation results.
+        """
+        if self.truncated is not None:
+            return RVResults(self.truncated.draws(n))
+        results = []
+        while len(results) < n:
+            for outcome in self.prob_space.draws(n - len(results)):
+                if self.condition_event.func(outcome):
+                    results.append(self.func(outcome))
+        return RVResults(results)
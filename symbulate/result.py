@@ -150,6 +150,15 @@ class Tuple(Arithmetic, Transformable, Statistical, Filterable):
     def cumsum(self):
         return type(self)(np.cumsum(self.values))
 
+    def cumprod(self):
+        return type(self)(np.cumprod(self.values))
+
+    def cummax(self):
+        return type(self)(np.maximum.accumulate(self.values))
+
+    def cummin(self):
+        return type(self)(np.minimum.accumulate(self.values))
+
     def plot(self, **kwargs):
         plt.plot(range(len(self)), self.values, '.--', **kwargs)
 
@@ -171,6 +180,150 @@ class Vector(Tuple):
     pass
 
 
+class ArrayBuffer:
+    """A numpy array that can grow at the end.
+
+    Values are stored in a preallocated array, whose capacity is
+    doubled whenever it fills up, so that appending n values takes
+    O(n) time in total and no boxed Python objects are stored.
+
+    Args:
+      dtype: the dtype of the values
+
+    Attributes:
+      array (np.ndarray): a view of the values stored so far
+    """
+
+    def __init__(self, dtype=float):
+        self._data = np.empty(16, dtype=dtype)
+        self._size = 0
+
+    @classmethod
+    def from_array(cls, array):
+        """Wrap an existing array, without copying it.
+
+        The array is only copied if the buffer grows, so it can be
+        a view into a larger array (e.g., a row of a matrix).
+        """
+        buffer = cls(array.dtype)
+        buffer._data = array
+        buffer._size = len(array)
+        return buffer
+
+    def _reserve(self, size):
+        if size > len(self._data):
+            data = np.empty(max(size, 2 * len(self._data)),
+                            dtype=self._data.dtype)
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+
+    def append(self, value):
+        self._reserve(self._size + 1)
+        self._data[self._size] = value
+        self._size += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._data.dtype)
+        self._reserve(self._size + len(values))
+        self._data[self._size:self._size + len(values)] = values
+        self._size += len(values)
+
+    def insert(self, n, value):
+        self._reserve(self._size + 1)
+        self._data[n + 1:self._size + 1] = self._data[n:self._size]
+        self._data[n] = value
+        self._size += 1
+
+    @property
+    def array(self):
+        return self._data[:self._size]
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, n):
+        return self.array[n]
+
+
+class ValueBuffer(ArrayBuffer):
+    """An ArrayBuffer for the values of a lazy sequence, of any type.
+
+    The dtype is chosen when the first values are added: ints and
+    floats are stored in an int or float array, and anything else
+    (e.g., strings or Vectors) in an object array. If values of a
+    different type are added later, the array becomes an object array,
+    so values always come back as the same Python objects (e.g., ints
+    stay ints).
+    """
+
+    def __init__(self):
+        super().__init__(object)
+
+    def extend(self, values):
+        dtype = _buffer_dtype(values)
+        if self._size == 0:
+            self._data = np.empty(len(self._data), dtype=dtype)
+        elif dtype != self._data.dtype:
+            self._data = self._data.astype(object)
+        if self._data.dtype == object:
+            values = np.fromiter(values, dtype=object, count=len(values))
+        super().extend(values)
+
+    def append(self, value):
+        self.extend([value])
+
+    def __getitem__(self, n):
+        value = self.array[n]
+        return value.item() if isinstance(value, np.generic) else value
+
+
+def _buffer_dtype(values):
+    # int64 or float64 if all of the values are ints or all are floats,
+    # object otherwise
+    if isinstance(values, np.ndarray) and values.ndim == 1:
+        if values.dtype.kind == "i":
+            return np.dtype(np.int64)
+        elif values.dtype.kind == "f":
+            return np.dtype(np.float64)
+    elif all(isinstance(value, (float, np.floating)) for value in values):
+        return np.dtype(np.float64)
+    elif all(isinstance(value, (int, np.integer)) and
+             not isinstance(value, bool) and
+             -2 ** 63 <= value < 2 ** 63 for value in values):
+        return np.dtype(np.int64)
+    return np.dtype(object)
+
+
+def vectorized(func):
+    """Declare that func can be evaluated at an array of indexes.
+
+    A lazy sequence (InfiniteTuple or DiscreteTimeFunction) whose func
+    is declared vectorized computes a whole range of missing values
+    with a single call func(indexes), which should return an array of
+    the values at the indexes.
+
+    Example:
+      x = InfiniteVector(vectorized(lambda n: n ** 2))
+    """
+    try:
+        func.vectorized = True
+    except AttributeError:
+        # (e.g., numpy ufuncs do not allow new attributes)
+        def _func(n):
+            return func(n)
+        _func.vectorized = True
+        return _func
+    return func
+
+
+def _evaluate(func, start, stop, step=1):
+    # The values of func at range(start, stop, step), in one call if
+    # func is declared vectorized.
+    if getattr(func, "vectorized", False):
+        return np.asarray(func(np.arange(start, stop, step)))
+    return [func(i) for i in range(start, stop, step)]
+
+
 class TimeFunction(Arithmetic):
 
     @classmethod
@@ -211,21 +364,21 @@ class InfiniteTuple(TimeFunction):
         if func is not None:
             self.func = func
         self.index_set = Naturals()
-        self.values = []
+        self.values = ValueBuffer()
 
-    def __getitem__(self, n):
+    def _fill(self, stop):
+        # Compute the values up to (but not including) position stop.
         m = len(self.values)
-        # Add necessary elements to self.values
-        n0 = None
+        if stop > m:
+            self.values.extend(_evaluate(self.func, m, stop))
+
+    def __getitem__(self, n):
         # TODO: add support for infinite slices with no stop
-        if isinstance(n, slice) and n.stop >= m:
-            n0 = n.stop
-        elif isinstance(n, numbers.Integral) and n >= m:
-            n0 = n
-        if n0 is not None:
-            for i in range(m, n0 + 1):
-                self.values.append(self.func(i))
-        # Return the corresponding value(s)
+        if isinstance(n, slice):
+            self._fill(n.stop)
+            return self.values.array[n].tolist()
+        if n >= 0:
+            self._fill(n + 1)
         return self.values[n]
 
     def __call__(self, n):
@@ -279,14 +432,50 @@ class InfiniteTuple(TimeFunction):
 
 class InfiniteVector(InfiniteTuple):
 
-    def cumsum(self):
+    def _accumulate(self, ufunc):
+        # The running totals of the vector under ufunc (e.g., np.add).
+        # The totals are kept in a prefix array, which is extended a
+        # block at a time from the last total, so the first n totals
+        # take O(n) time to compute (instead of O(n^2)).
+        totals = ValueBuffer()
+
+        @vectorized
         def _func(n):
-            return sum(self[i] for i in range(n + 1))
+            stop = int(n.max() if np.ndim(n) else n) + 1
+            m = len(totals)
+            if stop > m:
+                self._fill(stop)
+                values = self.values.array[m:stop]
+                if m > 0:
+                    # continue from the last total
+                    block = np.empty(len(values) + 1, dtype=values.dtype)
+                    block[0] = totals.array[-1]
+                    block[1:] = values
+                    values = ufunc.accumulate(block)[1:]
+                else:
+                    values = ufunc.accumulate(values)
+                totals.extend(values)
+            if np.ndim(n):
+                return totals.array[n]
+            return totals[n]
         return InfiniteVector(_func)
 
+    def cumsum(self):
+        return self._accumulate(np.add)
+
+    def cumprod(self):
+        return self._accumulate(np.multiply)
+
+    def cummax(self):
+        return self._accumulate(np.maximum)
+
+    def cummin(self):
+        return self._accumulate(np.minimum)
+
     def plot(self, tmin=0, tmax=10, **kwargs):
         xs = range(tmin, tmax)
-        ys = [self[t] for t in range(tmin, tmax)]
+        self._fill(tmax)
+        ys = self.values.array[tmin:tmax]
         plt.plot(xs, ys, '.--', **kwargs)
 
 
@@ -312,8 +501,28 @@ class DiscreteTimeFunction(TimeFunction):
             self.index_set = DiscreteTimeSequence(fs)
         else:
             self.index_set = index_set
-        self.array_pos = [] # stores values for t >= 0
-        self.array_neg = [] # stores values for t < 0
+        self.array_pos = ValueBuffer() # stores values for t >= 0
+        self.array_neg = ValueBuffer() # stores values for t < 0
+
+    def _fill(self, nmin, nmax):
+        # Compute the values at indexes nmin, ..., nmax - 1.
+        m = len(self.array_pos)
+        if nmax > m:
+            self.array_pos.extend(_evaluate(self.func, m, nmax))
+        m = len(self.array_neg)
+        if -nmin > m:
+            self.array_neg.extend(_evaluate(self.func, -m - 1, nmin - 1, -1))
+
+    def _get_values(self, indexes):
+        # The values at an array of indexes, as an array.
+        if len(indexes) == 0:
+            return np.array([])
+        self._fill(min(indexes.min(), 0), indexes.max() + 1)
+        if indexes.min() >= 0:
+            return self.array_pos.array[indexes]
+        values = np.concatenate([self.array_neg.array[::-1],
+                                 self.array_pos.array])
+        return values[indexes + len(self.array_neg)]
 
     def _get_value_at_index(self, n):
         if not isinstance(n, numbers.Integral):
@@ -323,16 +532,10 @@ class DiscreteTimeFunction(TimeFunction):
                 "If you want the value at time t, try f(t) instead.")
 
         if n >= 0:
-            m = len(self.array_pos)
-            if n >= m:
-                for i in range(m, n + 1):
-                    self.array_pos.append(self.func(i))
+            self._fill(0, n + 1)
             return self.array_pos[n]
         else:
-            m = len(self.array_neg)
-            if -n > m:
-                for i in range(-m - 1, n - 1, -1):
-                    self.array_neg.append(self.func(i))
+            self._fill(n, 0)
             return self.array_neg[-n - 1]
 
     def _get_value_at_time(self, t):
@@ -347,10 +550,13 @@ class DiscreteTimeFunction(TimeFunction):
         if is_number(n):
             return self._get_value_at_index(n)
         elif is_numeric_vector(n):
-            return Vector(self._get_value_at_index(e) for e in n)
+            indexes = np.asarray(n)
+            if indexes.dtype.kind not in "iu":
+                return Vector(self._get_value_at_index(e) for e in n)
+            return Vector(self._get_values(indexes).tolist())
         elif isinstance(n, slice):
-            return Vector(self._get_value_at_index(e) for e in
-                          range(n.start, n.stop, n.step or 1))
+            indexes = np.arange(n.start, n.stop, n.step or 1)
+            return Vector(self._get_values(indexes).tolist())
         else:
             raise TypeError("Cannot evaluate DiscreteTimeFunction at "
                             "index %s (type %s)." % (n, type(n).__name__))
@@ -423,8 +629,9 @@ class DiscreteTimeFunction(TimeFunction):
     def plot(self, tmin=0, tmax=10, **kwargs):
         nmin = int(np.floor(tmin * self.index_set.fs))
         nmax = int(np.ceil(tmax * self.index_set.fs))
-        ts = [self.index_set[n] for n in range(nmin, nmax)]
-        ys = [self[n] for n in range(nmin, nmax)]
+        indexes = np.arange(nmin, nmax)
+        ts = indexes / self.index_set.fs
+        ys = self._get_values(indexes)
         plt.plot(ts, ys, ".--", **kwargs)
 
 
@@ -533,6 +740,86 @@ class DiscreteValued:
         return self.interarrival_times.cumsum()
 
 
+class JumpFunction(ContinuousTimeFunction, DiscreteValued):
+    """A step function of time that jumps at a sequence of arrival times.
+
+    On the interval [arrival_times[k-1], arrival_times[k]), the function
+    takes the kth value (with arrival_times[-1] taken to be -inf). The
+    arrival times are generated lazily, a block at a time, and stored
+    cumulatively in an ArrayBuffer, so evaluating the function at a
+    time (or at a whole vector of times) is a binary search.
+
+    Subclasses define _values(indexes), which returns a list of the
+    values with the given indexes, and either
+    _next_interarrival_times(start, size), which returns the
+    interarrival times start, ..., start + size - 1 (inf if there are
+    no more jumps), or _next_arrival_times(start, size), which returns
+    the arrival times after self.horizon (about size of them) and
+    advances self.horizon, the time up to which all of the arrival
+    times are known.
+    """
+
+    # the minimum number of interarrival times to generate at a time
+    block_size = 64
+
+    def __init__(self):
+        self.arrivals = ArrayBuffer(float)
+        self.horizon = 0
+        self.interarrival_times = InfiniteVector(self._interarrival_time)
+        super().__init__(lambda t: self(t))
+
+    def _next_arrival_times(self, start, size):
+        times = self.horizon + np.cumsum(
+            self._next_interarrival_times(start, size))
+        self.horizon = times[-1]
+        return times
+
+    def _generate(self):
+        # Generate the next block of arrival times (returns False
+        # if the horizon is inf, i.e., there are no more jumps).
+        if self.horizon == np.inf:
+            return False
+        m = len(self.arrivals)
+        self.arrivals.extend(
+            self._next_arrival_times(m, max(self.block_size, m)))
+        return True
+
+    def _generate_until_time(self, t):
+        while self.horizon <= t and self._generate():
+            pass
+
+    def _generate_until_index(self, n):
+        while len(self.arrivals) <= n and self._generate():
+            pass
+
+    def _interarrival_time(self, n):
+        self._generate_until_index(n)
+        if n >= len(self.arrivals) or self.arrivals[n] == np.inf:
+            return np.inf
+        if n == 0:
+            return self.arrivals[0]
+        return self.arrivals[n] - self.arrivals[n - 1]
+
+    def _arrival_time(self, n):
+        self._generate_until_index(n)
+        if n >= len(self.arrivals):
+            return np.inf
+        return self.arrivals[n]
+
+    def __call__(self, t):
+        if is_number(t) or is_numeric_vector(t):
+            times = np.asarray(t, dtype=float)
+            self._generate_until_time(times.max() if times.size else 0)
+            indexes = np.searchsorted(self.arrivals.array, times,
+                                      side="right")
+            values = self._values(np.atleast_1d(indexes))
+            return values[0] if is_number(t) else Vector(values)
+        return super().__call__(t)
+
+    def get_arrival_times(self):
+        return InfiniteVector(self._arrival_time)
+
+
 def join(result1, result2):
     """Joins two result objects into a single result object.
 
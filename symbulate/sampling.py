@@ -0,0 +1,181 @@
+"""Fast samplers for discrete distributions.
+
+This module provides data structures that are built once from
+a vector of weights and can then be used to sample indexes
+repeatedly, without re-validating or re-normalizing the
+weights on every draw.
+"""
+import numpy as np
+
+
+def _build_alias(probs):
+    # Vose's version of Walker's alias method. probs must be
+    # a 1-D array of non-negative numbers that sum to 1.
+    n = len(probs)
+    scaled = probs * n
+    prob = np.ones(n)
+    alias = np.arange(n)
+    small = [i for i in range(n) if scaled[i] < 1]
+    large = [i for i in range(n) if scaled[i] >= 1]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = (scaled[l] + scaled[s]) - 1
+        if scaled[l] < 1:
+            small.append(l)
+        else:
+            large.append(l)
+    # Any remaining entries have probability 1 (up to rounding).
+    return prob, alias
+
+
+def _build_alias_rows(probs):
+    # The same algorithm as _build_alias, for every row of a matrix of
+    # probabilities at once: the small and large worklists of all of
+    # the rows are stacks stored in arrays, and each step pops one
+    # small and one large entry from every row that still has both.
+    # This takes O(n) vectorized steps for n columns, instead of O(n^2)
+    # steps of a Python loop.
+    m, n = probs.shape
+    scaled = probs * n
+    prob = np.ones((m, n))
+    alias = np.tile(np.arange(n), (m, 1))
+    # (each worklist starts with its entries in order, at the bottom)
+    small = np.argsort(scaled >= 1, axis=1, kind="stable")
+    large = np.argsort(scaled < 1, axis=1, kind="stable")
+    n_small = np.sum(scaled < 1, axis=1)
+    n_large = n - n_small
+    rows = np.arange(m)
+    while True:
+        active = (n_small > 0) & (n_large > 0)
+        if not active.any():
+            break
+        r = rows[active]
+        n_small[r] -= 1
+        n_large[r] -= 1
+        s = small[r, n_small[r]]
+        l = large[r, n_large[r]]
+        prob[r, s] = scaled[r, s]
+        alias[r, s] = l
+        scaled[r, l] = (scaled[r, l] + scaled[r, s]) - 1
+        # push l back onto the small or the large worklist
+        to_small = scaled[r, l] < 1
+        rs, rl = r[to_small], r[~to_small]
+        small[rs, n_small[rs]] = l[to_small]
+        n_small[rs] += 1
+        large[rl, n_large[rl]] = l[~to_small]
+        n_large[rl] += 1
+    return prob, alias
+
+
+class AliasTable:
+    """Samples indexes from a discrete distribution in O(1) time.
+
+    The table is built once in O(n) time from a vector of weights,
+    using Walker's alias method. After that, every draw costs one
+    uniform index and one uniform number, no matter how many
+    outcomes there are.
+
+    If the weights are a matrix, a separate table is built for each
+    row (e.g., for each row of a transition matrix). The tables for
+    all of the rows are built together, in O(n) vectorized steps.
+
+    Args:
+      weights (array_like): non-negative weights for each of the
+        outcomes 0, 1, ..., n-1 (they need not sum to 1), either as
+        a vector or as a matrix with one distribution per row
+
+    Attributes:
+      n (int): the number of outcomes
+      probs (np.ndarray): the normalized weights
+      prob (np.ndarray): the probability of keeping each column
+      alias (np.ndarray): the outcome to use when a column is not kept
+    """
+
+    # the largest table that walk copies into Python lists
+    max_flat_size = 2 ** 20
+
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=float)
+        if weights.ndim not in (1, 2) or weights.shape[-1] == 0:
+            raise Exception("Weights must be a non-empty vector or matrix.")
+        if np.any(weights < 0):
+            raise Exception("Weights cannot be negative.")
+        totals = weights.sum(axis=-1, keepdims=True)
+        if not np.all(totals > 0):
+            raise Exception("Weights must have a positive sum.")
+        self.n = weights.shape[-1]
+        self.probs = weights / totals
+        if weights.ndim == 1:
+            self.prob, self.alias = _build_alias(self.probs)
+        else:
+            self.prob, self.alias = _build_alias_rows(self.probs)
+
+    def sample(self, size=None):
+        """Draw indexes from the distribution.
+
+        Args:
+          size (int or tuple): the shape of the output
+            (by default, a single index is returned)
+
+        Returns:
+          An int (if size is None) or an array of ints of shape size.
+        """
+        columns = np.random.randint(self.n, size=size)
+        keep = np.random.random_sample(size) < self.prob[columns]
+        indexes = np.where(keep, columns, self.alias[columns])
+        if size is None:
+            return int(indexes)
+        return indexes
+
+    def sample_rows(self, rows):
+        """Draw one index from each of the given rows.
+
+        Args:
+          rows (array_like of ints): the rows to sample from
+            (only for tables built from a matrix of weights)
+
+        Returns:
+          An array of ints of the same shape as rows.
+        """
+        rows = np.asarray(rows)
+        columns = np.random.randint(self.n, size=rows.shape)
+        keep = np.random.random_sample(rows.shape) < self.prob[rows, columns]
+        return np.where(keep, columns, self.alias[rows, columns])
+
+    def walk(self, row, steps):
+        """Draw a sequence of indexes, using each draw as the next row.
+
+        This is how a single path of a Markov chain is simulated: the
+        random numbers for all of the steps are drawn at once, and only
+        the (inherently sequential) table lookups are done one at a time.
+
+        Args:
+          row (int): the row to start from
+          steps (int): how many indexes to draw
+
+        Returns:
+          list: the steps indexes that were drawn
+        """
+        # Python lists are much faster than numpy arrays to index
+        # one element at a time, so small tables are flattened into
+        # lists once. (Large tables are indexed in place, since the
+        # lists would take several times as much memory.)
+        if self.prob.size > self.max_flat_size:
+            prob, alias = self.prob.ravel(), self.alias.ravel()
+        else:
+            if not hasattr(self, "_flat_table"):
+                self._flat_table = (self.prob.ravel().tolist(),
+                                    self.alias.ravel().tolist())
+            prob, alias = self._flat_table
+        n = self.n
+        columns = np.random.randint(n, size=steps).tolist()
+        us = np.random.random_sample(steps).tolist()
+        indexes = []
+        for column, u in zip(columns, us):
+            i = row * n + column
+            row = column if u < prob[i] else int(alias[i])
+            indexes.append(row)
+        return indexes
@@ -688,3 +688,103 @@ class TestBivariateNormal(unittest.TestCase):
             self.assertTrue(pval > 0.01)
 
 
+
+
+class TestTruncated(unittest.TestCase):
+
+    def test_Exponential_memoryless_tail(self):
+        X = RV(Exponential(rate=2))
+        sims = (X | (X > 40)).sim(Nsim)
+        cdf = stats.expon(loc=40, scale=1 / 2).cdf
+        pval = stats.kstest(sims, cdf).pvalue
+        self.assertTrue(pval > .01)
+
+    def test_Normal_interval(self):
+        Z = RV(Normal(0, 1))
+        sims = (Z | ((Z > -1) & (Z < 2))).sim(Nsim)
+        cdf = stats.truncnorm(a=-1, b=2).cdf
+        pval = stats.kstest(sims, cdf).pvalue
+        self.assertTrue(pval > .01)
+
+    def test_Truncated_probability_zero(self):
+        U = RV(Uniform(0, 1))
+        self.assertRaises(Exception, lambda: U | (U > 2))
+
+    def test_Truncated_discrete(self):
+        self.assertRaises(Exception, lambda: Poisson(3).truncate(1, 5))
+        X = RV(Poisson(3))
+        self.assertIsNone((X | (X > 2)).truncated)
+        self.assertTrue(all(x > 2 for x in (X | (X > 2)).sim(100)))
+
+
+class TestArrayParameters(unittest.TestCase):
+
+    def test_Binomial_sweep_shape(self):
+        ps = np.linspace(.1, .9, 5)
+        sims = RV(Binomial(n=10, p=ps)).sim(Nsim)
+        self.assertEqual(sims.dim, 5)
+        means = np.asarray(sims.mean())
+        self.assertTrue(np.allclose(means, 10 * ps, atol=.1))
+
+    def test_Normal_broadcast(self):
+        sims = RV(Normal(mean=[0, 10, 20], sd=1)).sim(Nsim)
+        self.assertTrue(np.allclose(sims.mean(), [0, 10, 20], atol=.1))
+        self.assertTrue(np.allclose(sims.sd(), [1, 1, 1], atol=.1))
+
+    def test_array_parameter_errors(self):
+        self.assertRaises(Exception, lambda: Binomial(n=[5, -1], p=.5))
+        self.assertRaises(Exception, lambda: Binomial(n=5, p=[.5, 1.5]))
+        self.assertRaises(Exception, lambda: Poisson(lam=[1, 0]))
+
+
+class TestHierarchical(unittest.TestCase):
+
+    def test_Poisson_Binomial_thinning(self):
+        N = RV(Poisson(lam=4))
+        sims = RV(Binomial(n=N, p=.5)).sim(Nsim)
+        simulated = sims.tabulate()
+        exp_list, obs_list = [], []
+        for k in range(10):
+            expected = Nsim * stats.poisson(mu=2).pmf(k)
+            if expected > 5:
+                exp_list.append(expected)
+                obs_list.append(simulated[k])
+        # the sum of expected counts only covers the bins listed
+        obs_list.append(Nsim - sum(obs_list))
+        exp_list.append(Nsim - sum(exp_list))
+        pval = stats.chisquare(obs_list, exp_list).pvalue
+        self.assertTrue(pval > 0.01)
+
+    def test_Normal_random_mean(self):
+        M = RV(Normal(mean=3, sd=1))
+        sims = RV(Normal(mean=M, sd=1)).sim(Nsim)
+        cdf = stats.norm(loc=3, scale=sqrt(2)).cdf
+        pval = stats.kstest(sims, cdf).pvalue
+        self.assertTrue(pval > 0.01)
+
+    def test_joint_with_parent(self):
+        M = RV(Normal(mean=0, sd=3))
+        X = RV(Normal(mean=M, sd=1))
+        sims = (M & X).sim(Nsim)
+        self.assertAlmostEqual(sims.cov(), 9, delta=.5)
+        pval = stats.kstest((X - M).sim(Nsim), stats.norm().cdf).pvalue
+        self.assertTrue(pval > 0.01)
+
+    def test_condition_on_parent(self):
+        M = RV(BoxModel([0, 10]))
+        X = RV(Normal(mean=M, sd=1))
+        sims = (X | (M > 5)).sim(Nsim)
+        cdf = stats.norm(loc=10).cdf
+        pval = stats.kstest(sims, cdf).pvalue
+        self.assertTrue(pval > 0.01)
+
+    def test_power_shares_parent(self):
+        M = RV(Normal(mean=0, sd=3))
+        X1, X2 = RV(Normal(mean=M, sd=1) ** 2)
+        sims = (X1 & X2).sim(Nsim)
+        self.assertAlmostEqual(sims.cov(), 9, delta=.5)
+
+    def test_array_parameter_error(self):
+        M = RV(Normal(mean=0, sd=1))
+        self.assertRaises(Exception,
+                          lambda: Normal(mean=M, sd=[1, 2]))
@@ -0,0 +1,295 @@
+import unittest
+import numpy as np
+
+from symbulate import *
+from symbulate.gaussian_process import (CirculantGrid, FourierFeatures,
+                                        GaussianGrid)
+
+Nsim = 10000
+
+
+def exponential_cov(s, t):
+    return np.exp(-abs(s - t))
+
+
+class TestGaussianProcess(unittest.TestCase):
+
+    def test_covariance(self):
+        X = GaussianProcess(lambda t: 1, exponential_cov)
+        times = [2, 0, 1, .5]
+        paths = X.sim(Nsim).apply(lambda path: path(times))
+        values = np.array([list(path) for path in paths])
+        expected = np.array([[exponential_cov(s, t) for t in times]
+                             for s in times])
+        self.assertTrue(np.allclose(values.mean(axis=0), 1, atol=.05))
+        self.assertTrue(np.allclose(np.cov(values.T), expected, atol=.05))
+
+    def test_repeated_time(self):
+        path = GaussianProcess(lambda t: 0, exponential_cov).draw()
+        value = path(1)
+        path(2)
+        self.assertEqual(path(1), value)
+
+    def test_many_times(self):
+        path = GaussianProcess(lambda t: 0, exponential_cov).draw()
+        values = [path(t) for t in np.linspace(0, 10, 500)]
+        self.assertEqual(len(path.conditioner), 500)
+        self.assertTrue(np.all(np.isfinite(values)))
+
+    def test_discrete_time(self):
+        X = GaussianProcess(lambda t: 0, lambda s, t: min(s, t) + 1,
+                            index_set=DiscreteTimeSequence(2))
+        path = X.draw()
+        self.assertEqual(path[3], path(1.5))
+
+    def test_sim_times(self):
+        X = GaussianProcess(lambda t: 1, exponential_cov)
+        times = np.linspace(0, 2, 21)
+        sims = X.sim(Nsim, times=times)
+        self.assertEqual(sims.grid_values.shape, (Nsim, 21))
+        expected = np.array([[exponential_cov(s, t) for t in times[[0, 5]]]
+                             for s in times[[0, 5]]])
+        self.assertTrue(np.allclose(np.cov(sims.grid_values[:, [0, 5]].T),
+                                    expected, atol=.05))
+        self.assertEqual(sims.get(0)(times[5]), sims.grid_values[0, 5])
+        # values on the grid are looked up, without a conditioner
+        self.assertIsNone(sims.get(0)._conditioner)
+        self.assertTrue(np.shares_memory(sims.get(1).grid_values,
+                                         sims.grid_values))
+
+    def test_sim_times_off_grid(self):
+        X = GaussianProcess(lambda t: 0, exponential_cov)
+        sims = X.sim(Nsim, times=[0, 1, 2])
+        off_grid = np.array(list(sims.apply(lambda path: path(1.5))))
+        self.assertTrue(abs(off_grid.var() - 1) < .05)
+        on_grid = sims.grid_values[:, 1]
+        self.assertTrue(abs(np.mean(off_grid * on_grid) -
+                            exponential_cov(1, 1.5)) < .05)
+
+
+class TestKernels(unittest.TestCase):
+
+    kernels = [RBF(2), Matern12(), Matern32(.5), Matern52(variance=3),
+               Periodic(period=2), OrnsteinUhlenbeck(2, 3), Brownian(2)]
+
+    def test_matrix(self):
+        times = np.linspace(0, 5, 30)
+        for kernel in self.kernels:
+            matrix = kernel.matrix(times)
+            expected = [[kernel(float(s), float(t)) for t in times]
+                        for s in times]
+            self.assertTrue(np.allclose(matrix, expected))
+            self.assertTrue(np.linalg.eigvalsh(matrix).min() > -1e-8)
+
+    def test_combinations(self):
+        kernel = RBF(2) + .5 * Matern12() * Periodic()
+        self.assertTrue(isinstance(kernel, Stationary))
+        self.assertTrue(np.isclose(
+            kernel(1, 2.5),
+            np.exp(-1.5 ** 2 / 8) + .5 * np.exp(-1.5) *
+            np.exp(-2 * np.sin(1.5 * np.pi) ** 2)))
+        kernel = RBF() + Brownian()
+        self.assertFalse(isinstance(kernel, Stationary))
+        self.assertTrue(np.isclose(kernel(1, 3), np.exp(-2) + 1))
+
+    def test_scalar_cov_func(self):
+        # covariance functions that do not work on arrays still work
+        X = GaussianProcess(lambda t: 0, lambda s, t: min(s, t))
+        sims = X.sim(Nsim, times=[1, 2])
+        self.assertTrue(np.allclose(np.cov(sims.grid_values.T),
+                                    [[1, 1], [1, 2]], atol=.1))
+
+
+class TestStationaryGaussianProcess(unittest.TestCase):
+
+    cov = Stationary(lambda h: np.exp(-abs(h)))
+
+    def test_circulant_covariance(self):
+        X = GaussianProcess(lambda t: 1, self.cov, DiscreteTimeSequence(10))
+        times = np.arange(40) / 10
+        sims = X.sim(Nsim, times=times)
+        self.assertTrue(isinstance(X.prob_space.grid, CirculantGrid))
+        self.assertTrue(abs(sims.grid_values.mean() - 1) < .05)
+        values = sims.grid_values[:, [0, 3, 10, 39]]
+        expected = exponential_cov(*np.ix_(times[[0, 3, 10, 39]],
+                                           times[[0, 3, 10, 39]]))
+        self.assertTrue(np.allclose(np.cov(values.T), expected, atol=.05))
+
+    def test_circulant_off_grid(self):
+        X = GaussianProcess(lambda t: 0, self.cov, DiscreteTimeSequence(10))
+        sims = X.sim(Nsim, times=np.arange(20) / 10)
+        path = sims.get(0)
+        self.assertEqual(path[7], sims.grid_values[0, 7])
+        # index 25 is half a unit of time after the end of the grid
+        off_grid = np.array(list(sims.apply(lambda path: path[25])))
+        self.assertTrue(abs(off_grid.var() - 1) < .05)
+        self.assertTrue(abs(np.mean(off_grid * sims.grid_values[:, -1]) -
+                            np.exp(-.6)) < .05)
+
+    def test_large_grid(self):
+        # the example in the docstring of Stationary
+        cov = Stationary(lambda h: exp(-abs(h)))
+        X = GaussianProcess(lambda t: 0, cov, DiscreteTimeSequence(100))
+        paths = X.sim(10, times=np.arange(2 ** 20) / 100)
+        self.assertEqual(paths.grid_values.shape, (10, 2 ** 20))
+        self.assertEqual(paths.get(0)[7], paths.grid_values[0, 7])
+        # a path on a grid this large cannot be conditioned on it
+        self.assertRaises(Exception, lambda: paths.get(0)[2 ** 20 + 5])
+
+    def test_not_positive_semidefinite(self):
+        cov = Stationary(lambda h: np.exp(-h ** 2 / 2 / 1000 ** 2))
+        X = GaussianProcess(lambda t: 0, cov, DiscreteTimeSequence(1))
+        sims = X.sim(10, times=np.arange(100))
+        self.assertTrue(isinstance(X.prob_space.grid, GaussianGrid))
+        self.assertEqual(sims.grid_values.shape, (10, 100))
+
+
+class TestBrownianMotion(unittest.TestCase):
+
+    def test_covariance(self):
+        B = BrownianMotion(drift=1, scale=2)
+        sims = B.sim(Nsim).apply(lambda path: (path(2), path(.5), path(1)))
+        values = np.array([list(sim) for sim in sims])
+        self.assertTrue(np.allclose(values.mean(axis=0), [2, .5, 1],
+                                    atol=.1))
+        expected = 4 * np.minimum.outer([2, .5, 1], [2, .5, 1])
+        self.assertTrue(np.allclose(np.cov(values.T), expected, atol=.4))
+
+    def test_bridge(self):
+        B = BrownianMotion()
+        sims = B.sim(Nsim).apply(lambda path: path(3) - path(2) - path(1))
+        self.assertTrue(abs(sims.mean()) < .05)
+        # the bridge from time 1 to 3, at time 2, has variance 1 / 2
+        sims = B.sim(Nsim).apply(
+            lambda path: path(2) - sum(path([1, 3])) / 2)
+        self.assertTrue(abs(sims.var() - .5) < .05)
+
+    def test_sim_times(self):
+        B = BrownianMotion(drift=-1)
+        times = [2, .5, 1]
+        sims = B.sim(Nsim, times=times)
+        self.assertEqual(sims.grid_values.shape, (Nsim, 3))
+        self.assertTrue(np.allclose(sims.grid_values.var(axis=0), times,
+                                    atol=.1))
+
+    def test_sim_sorted_times(self):
+        B = BrownianMotion(scale=2)
+        times = np.linspace(0, 2, 5)
+        sims = B.sim(Nsim, times=times)
+        self.assertTrue(np.allclose(sims.grid_values.var(axis=0), 4 * times,
+                                    atol=.4))
+        # the values at sorted times are not copied
+        self.assertTrue(np.shares_memory(sims.grid_values,
+                                         sims.get(0).values.array))
+        self.assertEqual(sims.get(3)(times[2]), sims.grid_values[3, 2])
+        path = sims.get(0)
+        self.assertEqual(path(.5), sims.grid_values[0, 1])
+        self.assertEqual(path(0), 0)
+        self.assertRaises(Exception, lambda: path(-1))
+
+
+class TestLowRankGaussianProcess(unittest.TestCase):
+
+    times = np.linspace(0, 10, 50)
+
+    def test_fourier(self):
+        X = GaussianProcess(lambda t: 1, Matern52(2))
+        sims = X.sim(Nsim, times=self.times, approximation="fourier",
+                     rank=2000)
+        self.assertTrue(sims.approximation_error < .1)
+        self.assertTrue(abs(sims.grid_values.mean() - 1) < .05)
+        self.assertTrue(np.allclose(np.cov(sims.grid_values.T),
+                                    Matern52(2).matrix(self.times),
+                                    atol=.1))
+        path = sims.get(0)
+        self.assertTrue(np.isclose(path(self.times[7]),
+                                   sims.grid_values[0, 7]))
+
+    def test_nystrom(self):
+        X = GaussianProcess(lambda t: 0, lambda s, t: min(s, t))
+        sims = X.sim(Nsim, times=self.times, approximation="nystrom",
+                     rank=50)
+        self.assertTrue(sims.approximation_error < 1e-6)
+        self.assertTrue(np.allclose(np.cov(sims.grid_values.T),
+                                    Brownian().matrix(self.times),
+                                    atol=.4))
+        errors = [X.sim(1, times=self.times, approximation="nystrom",
+                        rank=rank).approximation_error
+                  for rank in [2, 5, 20]]
+        self.assertTrue(errors[0] > errors[1] > errors[2])
+
+    def test_errors(self):
+        X = GaussianProcess(lambda t: 0, lambda s, t: min(s, t))
+        self.assertRaises(Exception, lambda: X.sim(
+            10, times=self.times, approximation="fourier"))
+        self.assertRaises(Exception, lambda: X.sim(
+            10, times=self.times, approximation="cholesky"))
+        self.assertRaises(Exception, lambda: X.sim(
+            10, approximation="nystrom"))
+
+    def test_unknown_spectral_measure(self):
+        for cov in [Periodic(), RBF() + Stationary(lambda h: h == 0)]:
+            self.assertRaises(Exception, lambda: FourierFeatures(cov, 10))
+        self.assertTrue(isinstance(FourierFeatures(RBF() * Matern32(), 10),
+                                   FourierFeatures))
+
+
+class TestGaussianPosterior(unittest.TestCase):
+
+    obs_times = [0, 1, 2.5]
+    obs_values = [1.2, .3, -.5]
+    times = np.linspace(0, 4, 9)
+
+    def test_predict(self):
+        X = GaussianProcess(lambda t: 0, RBF())
+        Y = X.condition(self.obs_times, self.obs_values, noise=.1)
+        means, sds = Y.predict(self.times)
+        cov = RBF().matrix(self.obs_times) + .01 * np.eye(3)
+        cross = RBF().matrix(self.times, self.obs_times)
+        self.assertTrue(np.allclose(
+            means, cross @ np.linalg.solve(cov, self.obs_values)))
+        self.assertTrue(np.allclose(
+            sds ** 2, 1 - np.sum(cross.T * np.linalg.solve(cov, cross.T),
+                                 axis=0)))
+
+    def test_sim(self):
+        X = GaussianProcess(lambda t: 1, Matern32())
+        Y = X.condition(self.obs_times, self.obs_values, noise=.2)
+        means, sds = Y.predict(self.times)
+        sims = Y.sim(Nsim, times=self.times)
+        self.assertTrue(np.allclose(sims.grid_values.mean(axis=0), means,
+                                    atol=.05))
+        self.assertTrue(np.allclose(sims.grid_values.std(axis=0), sds,
+                                    atol=.05))
+        exact = X.condition(self.obs_times, self.obs_values)
+        self.assertTrue(np.isclose(exact.draw()(1), .3))
+
+    def test_update(self):
+        X = GaussianProcess(lambda t: 0, lambda s, t: min(s, t))
+        Y = X.condition(self.obs_times[:2], self.obs_values[:2], noise=.1)
+        Z = Y.condition(self.obs_times[2:], self.obs_values[2:], noise=.3)
+        W = X.condition(self.obs_times, self.obs_values, noise=[.1, .1, .3])
+        for z, w in zip(Z.predict(self.times), W.predict(self.times)):
+            self.assertTrue(np.allclose(z, w))
+        self.assertEqual(len(Y.posterior.times), 2)
+
+    def test_whiten_once(self):
+        X = GaussianProcess(lambda t: 0, RBF())
+        Y = X.condition(self.obs_times, self.obs_values, noise=.1)
+        whiten = Y.posterior._whiten
+        whitened = []
+
+        def _whiten(times):
+            whitened.append(len(times))
+            return whiten(times)
+        Y.posterior._whiten = _whiten
+        times = np.linspace(0, 4, 50)
+        cov = Y.posterior.matrix(times)
+        self.assertEqual(whitened, [50])
+        self.assertTrue(np.allclose(cov, Y.posterior.cov(times[:, np.newaxis],
+                                                         times)))
+        del whitened[:]
+        Y.sim(10, times=times)
+        # (the times are whitened once for the means, and once for
+        #  the covariance matrix, besides a few single times)
+        self.assertTrue(sum(whitened) < 3 * len(times))
@@ -0,0 +1,268 @@
+import unittest
+import numpy as np
+import scipy.linalg as linalg
+import scipy.sparse as sparse
+import scipy.stats as stats
+
+from symbulate import *
+
+Nsim = 10000
+
+P = [[.5, .5, 0],
+     [.25, .5, .25],
+     [0, .5, .5]]
+
+
+class TestMarkovChain(unittest.TestCase):
+
+    def test_horizon_shape(self):
+        X = MarkovChain(P, [1, 0, 0])
+        paths = X.sim(100, horizon=20)
+        self.assertEqual(paths.shape, (100, 21))
+        self.assertTrue(np.all(paths[:, 0] == 0))
+
+    def test_horizon_distribution(self):
+        X = MarkovChain(P, [1, 0, 0])
+        paths = X.sim(Nsim, horizon=3)
+        expected = Nsim * np.linalg.matrix_power(np.array(P), 3)[0]
+        observed = np.bincount(paths[:, 3], minlength=3)
+        pval = stats.chisquare(observed, expected).pvalue
+        self.assertTrue(pval > 0.01)
+
+    def test_horizon_labels(self):
+        X = MarkovChain(P, [0, 0, 1], state_labels=["a", "b", "c"])
+        paths = X.sim(10, horizon=5)
+        self.assertTrue(np.all(paths[:, 0] == "c"))
+        self.assertTrue(set(paths.ravel()).issubset({"a", "b", "c"}))
+
+    def test_kernel_shared(self):
+        X = MarkovChain(P, [1, 0, 0])
+        sims = X.sim(10)
+        self.assertTrue(all(sim.kernel is X.prob_space.kernel for sim in sims))
+
+    def test_path_distribution(self):
+        X = MarkovChain(P, [1, 0, 0])
+        simulated = X[5].sim(Nsim).tabulate()
+        expected = Nsim * np.linalg.matrix_power(np.array(P), 5)[0]
+        observed = [simulated[i] for i in range(3)]
+        pval = stats.chisquare(observed, expected).pvalue
+        self.assertTrue(pval > 0.01)
+
+    def test_compact_states(self):
+        X = MarkovChain(P, [1, 0, 0], state_labels=["a", "b", "c"])
+        path = X.draw()
+        self.assertEqual(path[0], "a")
+        self.assertEqual(path[2000:2010], [path[n] for n in range(2000, 2010)])
+        self.assertEqual(path.states.array.dtype, np.uint8)
+        self.assertTrue(len(path.states) > 2000)
+
+    def test_transition_matrix_errors(self):
+        self.assertRaises(Exception,
+                          lambda: MarkovChain([[.5, .6], [.5, .5]], [1, 0]))
+        self.assertRaises(Exception,
+                          lambda: MarkovChain([[1.5, -.5], [.5, .5]], [1, 0]))
+        self.assertRaises(Exception,
+                          lambda: MarkovChain([[.5, .5], [.5, .5]], [1, 0, 0]))
+
+
+class TestMarkovChainExact(unittest.TestCase):
+
+    def test_distribution_at(self):
+        X = MarkovChain(P, [1, 0, 0])
+        for n in [0, 1, 7, 50]:
+            exact = X.distribution_at(n)
+            expected = np.linalg.matrix_power(np.array(P), n)[0]
+            self.assertTrue(np.allclose([exact[i] for i in range(3)], expected))
+
+    def test_stationary_distribution(self):
+        X = MarkovChain(P, [1, 0, 0], state_labels=["a", "b", "c"])
+        pi = X.stationary_distribution()
+        self.assertTrue(np.allclose([pi["a"], pi["b"], pi["c"]],
+                                    [.25, .5, .25]))
+
+    def test_short_paths(self):
+        X = MarkovChain(P, [1, 0, 0])
+        path = X.draw()
+        path[1]
+        self.assertEqual(len(path.states), 2)
+        path[100]
+        self.assertTrue(101 <= len(path.states) <= 202)
+
+    def test_hitting_times(self):
+        X = MarkovChain(P, [1, 0, 0])
+        times = X.hitting_times(2)
+        self.assertTrue(np.allclose([times[i] for i in range(3)], [8, 6, 0]))
+
+
+class TestMarkovChainErgodic(unittest.TestCase):
+
+    def test_long_run_fractions(self):
+        X = MarkovChain(P, [1, 0, 0], state_labels=["a", "b", "c"])
+        fractions = X.long_run_fractions(10 ** 5)
+        self.assertTrue(np.allclose([fractions[x] for x in "abc"],
+                                    [.25, .5, .25], atol=.02))
+
+    def test_transition_counts(self):
+        X = MarkovChain(P, [1, 0, 0])
+        counts = X.transition_counts(10 ** 5)
+        self.assertEqual(counts.sum(), 10 ** 5)
+        self.assertEqual(counts[0, 2], 0)
+        estimate = counts / counts.sum(axis=1, keepdims=True)
+        self.assertTrue(np.allclose(estimate, P, atol=.02))
+
+    def test_time_average(self):
+        X = MarkovChain(P, [1, 0, 0])
+        mean, se = X.time_average(lambda x: x ** 2, 10 ** 5)
+        self.assertTrue(0 < se < .05)
+        self.assertTrue(abs(mean - 1.5) < 5 * se)
+
+
+class TestSparseMarkovChain(unittest.TestCase):
+
+    def test_sparse_distribution(self):
+        X = MarkovChain(sparse.csr_matrix(P), [1, 0, 0])
+        paths = X.sim(Nsim, horizon=3)
+        expected = Nsim * np.linalg.matrix_power(np.array(P), 3)[0]
+        observed = np.bincount(paths[:, 3], minlength=3)
+        pval = stats.chisquare(observed, expected).pvalue
+        self.assertTrue(pval > 0.01)
+
+    def test_sparse_exact(self):
+        X = MarkovChain(sparse.csr_matrix(P), [1, 0, 0])
+        Y = MarkovChain(P, [1, 0, 0])
+        for results in [(X.distribution_at(7), Y.distribution_at(7)),
+                        (X.stationary_distribution(),
+                         Y.stationary_distribution()),
+                        (X.hitting_times(2), Y.hitting_times(2))]:
+            self.assertTrue(np.allclose([results[0][i] for i in range(3)],
+                                        [results[1][i] for i in range(3)]))
+
+    def test_sparse_large_stationary(self):
+        # a birth-death chain on 10^5 states, reflected at the ends
+        n = 10 ** 5
+        up = np.full(n - 1, .3)
+        down = np.full(n - 1, .2)
+        P = sparse.diags([down, 1 - np.append(up, 0) - np.append(0, down),
+                          up], [-1, 0, 1], format="csr")
+        X = MarkovChain(P, np.eye(1, n)[0])
+        pi = X.stationary_distribution()
+        # (pi is geometric, with ratio 3 / 2 from each state to the next)
+        self.assertTrue(np.isclose(pi[n - 2] / pi[n - 1], 2 / 3))
+        self.assertTrue(np.isclose(pi[n - 1], 1 / 3))
+        self.assertRaises(Exception, lambda: MarkovChain(
+            sparse.identity(3, format="csr"), [1, 0, 0]
+        ).stationary_distribution())
+
+    def test_sparse_errors(self):
+        self.assertRaises(Exception, lambda: MarkovChain(
+            sparse.csr_matrix([[.5, .6], [.5, .5]]), [1, 0]))
+        self.assertRaises(Exception, lambda: ContinuousTimeMarkovChain(
+            sparse.csr_matrix([[-1, 2], [1, -1]]), [1, 0]))
+
+
+class TestContinuousTimeMarkovChain(unittest.TestCase):
+
+    def test_absorbing_state(self):
+        Q = [[-1, 1], [0, 0]]
+        X = ContinuousTimeMarkovChain(Q, [1, 0])
+        sims = X.sim(Nsim).apply(lambda path: path(2))
+        self.assertTrue(abs(sims.mean() - (1 - np.exp(-2))) < .02)
+
+    def test_sparse_generator(self):
+        Q = [[-1, 1], [0, 0]]
+        X = ContinuousTimeMarkovChain(sparse.csr_matrix(Q), [1, 0])
+        sims = X.sim(Nsim).apply(lambda path: path(2))
+        self.assertTrue(abs(sims.mean() - (1 - np.exp(-2))) < .02)
+
+    def test_vector_of_times(self):
+        Q = [[-1, 1, 0], [1, -2, 1], [0, 0, 0]]
+        X = ContinuousTimeMarkovChain(Q, [1, 0, 0],
+                                      state_labels=["a", "b", "c"])
+        path = X.draw()
+        times = np.linspace(0, 20, 50)
+        self.assertEqual(list(path(times)), [path(t) for t in times])
+
+    def test_arrival_times(self):
+        Q = [[-1, 1], [2, -2]]
+        path = ContinuousTimeMarkovChain(Q, [1, 0]).draw()
+        arrivals = arrival_times(path)
+        interarrivals = interarrival_times(path)
+        self.assertTrue(np.isclose(arrivals[9],
+                                   sum(interarrivals[n] for n in range(10))))
+        self.assertEqual(path(arrivals[9] - 1e-9), states(path)[9])
+        self.assertEqual(path(arrivals[9]), states(path)[10])
+
+    def test_sim_times(self):
+        Q = [[-1, 1], [2, -2]]
+        X = ContinuousTimeMarkovChain(Q, [1, 0])
+        times = [2, .5, 0]
+        paths = X.sim(Nsim, times=times)
+        self.assertEqual(paths.shape, (Nsim, 3))
+        self.assertTrue(np.all(paths[:, 2] == 0))
+        self.assertEqual(paths.dtype, np.uint8)
+        for i, t in enumerate(times[:2]):
+            expected = (1 - np.exp(-3 * t)) / 3
+            self.assertTrue(abs(paths[:, i].mean() - expected) < .02)
+
+
+class TestContinuousTimeMarkovChainExact(unittest.TestCase):
+
+    Q = [[-1, 1, 0], [1, -2, 1], [0, .5, -.5]]
+
+    def test_distribution_at(self):
+        X = ContinuousTimeMarkovChain(self.Q, [1, 0, 0])
+        times = np.linspace(0, 5, 21)
+        dists = X.distribution_at(times)
+        for t, dist in zip(times, dists):
+            expected = linalg.expm(np.array(self.Q) * t)[0]
+            self.assertTrue(np.allclose(dist, expected))
+        dist = X.distribution_at(2)
+        self.assertTrue(np.allclose([dist[i] for i in range(3)], dists[8]))
+
+    def test_sparse_distribution_at(self):
+        X = ContinuousTimeMarkovChain(sparse.csr_matrix(self.Q), [1, 0, 0])
+        expected = linalg.expm(np.array(self.Q) * 3)[0]
+        self.assertTrue(np.allclose(X.distribution_at([3])[0], expected))
+
+    def test_expm_cache(self):
+        X = ContinuousTimeMarkovChain(self.Q, [1, 0, 0])
+        times = np.cumsum(np.arange(1, 41) / 100)
+        dists = X.distribution_at(times)
+        expected = linalg.expm(np.array(self.Q) * times[-1])[0]
+        self.assertTrue(np.allclose(dists[-1], expected))
+        self.assertEqual(len(X.prob_space.expm_cache),
+                         X.prob_space.expm_cache_size)
+
+    def test_large_distribution_at(self):
+        X = ContinuousTimeMarkovChain(self.Q, [1, 0, 0])
+        X.prob_space.max_dense_expm = 2
+        expected = linalg.expm(np.array(self.Q) * 3)[0]
+        self.assertTrue(np.allclose(X.distribution_at([3])[0], expected))
+        self.assertEqual(len(X.prob_space.expm_cache), 0)
+
+    def test_stationary_distribution(self):
+        X = ContinuousTimeMarkovChain(self.Q, [1, 0, 0])
+        pi = X.stationary_distribution()
+        self.assertTrue(np.allclose([pi[i] for i in range(3)],
+                                    [.25, .25, .5]))
+
+    def test_sparse_large_stationary(self):
+        # a cycle through 10^5 states, with rate 1 out of each state
+        n = 10 ** 5
+        states = np.arange(n)
+        Q = sparse.csr_matrix(
+            (np.concatenate([-np.ones(n), np.ones(n)]),
+             (np.concatenate([states, states]),
+              np.concatenate([states, (states + 1) % n]))),
+            shape=(n, n))
+        X = ContinuousTimeMarkovChain(Q, np.eye(1, n)[0])
+        pi = X.stationary_distribution()
+        self.assertTrue(np.allclose([pi[0], pi[n // 2], pi[n - 1]], 1 / n))
+
+    def test_absorption_times(self):
+        Q = [[-1, 1, 0], [1, -3, 2], [0, 0, 0]]
+        X = ContinuousTimeMarkovChain(Q, [1, 0, 0])
+        times = X.absorption_times()
+        self.assertTrue(np.allclose([times[i] for i in range(3)], [2, 1, 0]))
+        Y = ContinuousTimeMarkovChain(self.Q, [1, 0, 0])
+        self.assertRaises(Exception, Y.absorption_times)
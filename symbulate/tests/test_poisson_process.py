@@ -0,0 +1,75 @@
+import unittest
+import numpy as np
+import scipy.stats as stats
+
+from symbulate import *
+
+Nsim = 10000
+
+
+class TestPoissonProcess(unittest.TestCase):
+
+    def test_count_distribution(self):
+        N = PoissonProcess(rate=2)
+        sims = N(3).sim(Nsim)
+        self.assertTrue(abs(sims.mean() - 6) < .15)
+
+    def test_vector_of_times(self):
+        path = PoissonProcess(rate=2).draw()
+        times = np.linspace(0, 20, 50)
+        self.assertEqual(list(path(times)), [path(t) for t in times])
+        arrivals = arrival_times(path)
+        self.assertEqual(path(arrivals[9] - 1e-9), 9)
+        self.assertEqual(path(arrivals[9]), 10)
+
+    def test_sim_times(self):
+        N = PoissonProcess(rate=2)
+        counts = N.sim(Nsim, times=[3, 1, 0])
+        self.assertEqual(counts.shape, (Nsim, 3))
+        self.assertTrue(np.all(counts[:, 2] == 0))
+        self.assertTrue(np.all(counts[:, 0] >= counts[:, 1]))
+        observed = np.bincount(counts[:, 1], minlength=8)[:8]
+        expected = Nsim * stats.poisson(2).pmf(np.arange(8))
+        observed[-1] = Nsim - observed[:-1].sum()
+        expected[-1] = Nsim - expected[:-1].sum()
+        pval = stats.chisquare(observed, expected).pvalue
+        self.assertTrue(pval > 0.01)
+
+    def test_sim_times_many_arrivals(self):
+        N = PoissonProcess(rate=100)
+        counts = N.sim(Nsim, times=[1, 2])
+        self.assertTrue(abs(counts[:, 1].mean() - 200) < 1)
+        self.assertTrue(abs((counts[:, 1] - counts[:, 0]).var() - 100) < 10)
+
+
+class TestNonHomogeneousPoissonProcess(unittest.TestCase):
+
+    def test_piecewise_rate(self):
+        N = PoissonProcess({0: 1, 2: 3, 5: 0, 6: 2})
+        counts = N.sim(Nsim, times=[3, 10])
+        self.assertTrue(np.allclose(counts.mean(axis=0), [5, 19], rtol=.05))
+        path = N.draw()
+        self.assertEqual(path(5), path(6))
+        paths = N.sim(1000).apply(lambda path: path(10))
+        self.assertTrue(abs(paths.mean() - 19) < 1)
+
+    def test_periodic_rate(self):
+        N = PoissonProcess({0: 1, 8: 5, 18: 2}, period=24)
+        counts = N.sim(Nsim, times=[10, 30])
+        self.assertTrue(np.allclose(counts.mean(axis=0), [18, 76], rtol=.05))
+
+    def test_thinned_rate(self):
+        N = PoissonProcess(lambda t: 2 + np.sin(t), rate_max=3)
+        expected = 2 * 10 + 1 - np.cos(10)
+        counts = N.sim(Nsim, times=[10])
+        self.assertTrue(abs(counts.mean() - expected) < .3)
+        paths = N.sim(1000).apply(lambda path: path(10))
+        self.assertTrue(abs(paths.mean() - expected) < 1)
+
+    def test_rate_errors(self):
+        self.assertRaises(Exception, lambda: PoissonProcess(lambda t: t))
+        self.assertRaises(Exception, lambda: PoissonProcess({1: 2}))
+        self.assertRaises(Exception,
+                          lambda: PoissonProcess({0: 1, 5: 2}, period=4))
+        N = PoissonProcess(lambda t: 5 + 0 * t, rate_max=3)
+        self.assertRaises(Exception, lambda: N.draw()(1))
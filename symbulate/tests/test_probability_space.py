@@ -0,0 +1,100 @@
+import unittest
+import numpy as np
+import scipy.stats as stats
+
+from symbulate import *
+from symbulate.sampling import AliasTable
+from symbulate.table import Table
+
+Nsim = 10000
+
+
+class TestAliasTable(unittest.TestCase):
+
+    def test_AliasTable_probs(self):
+        weights = [1, 0, 3, 6]
+        sims = AliasTable(weights).sample(Nsim)
+        obs = np.bincount(sims, minlength=4)
+        self.assertEqual(obs[1], 0)
+        exp = Nsim * np.array([.1, .3, .6])
+        pval = stats.chisquare(obs[[0, 2, 3]], exp).pvalue
+        self.assertTrue(pval > 0.01)
+
+    def test_AliasTable_rows(self):
+        weights = np.random.dirichlet(np.ones(30) * .3, size=20)
+        table = AliasTable(weights)
+        for row in range(20):
+            # each column keeps prob and gives the rest to its alias
+            probs = table.prob[row].copy()
+            np.add.at(probs, table.alias[row], 1 - table.prob[row])
+            self.assertTrue(np.allclose(probs / 30, weights[row]))
+
+    def test_AliasTable_error(self):
+        self.assertRaises(Exception, lambda: AliasTable([1, -1]))
+        self.assertRaises(Exception, lambda: AliasTable([0, 0]))
+
+
+class TestBoxModel(unittest.TestCase):
+
+    def test_BoxModel_probs(self):
+        P = BoxModel(["a", "b", "c"], probs=[.2, .3, .5])
+        simulated = RV(P).sim(Nsim).tabulate()
+        obs = [simulated[x] for x in ["a", "b", "c"]]
+        exp = [Nsim * p for p in [.2, .3, .5]]
+        pval = stats.chisquare(obs, exp).pvalue
+        self.assertTrue(pval > 0.01)
+
+    def test_BoxModel_dict_counts(self):
+        X = RV(BoxModel({0: 1, 1: 3}, size=4), sum)
+        simulated = X.sim(Nsim).tabulate()
+        exp_list, obs_list = [], []
+        for k in range(5):
+            exp_list.append(Nsim * stats.binom(n=4, p=.75).pmf(k))
+            obs_list.append(simulated[k])
+        pval = stats.chisquare(obs_list, exp_list).pvalue
+        self.assertTrue(pval > 0.01)
+
+    def test_BoxModel_Table(self):
+        table = RV(BoxModel([1, 2, 2])).sim(Nsim).tabulate(normalize=True)
+        sims = RV(BoxModel(table)).sim(Nsim)
+        self.assertTrue(abs(sims.mean() - 5 / 3) < .05)
+
+    def test_BoxModel_no_replace(self):
+        sims = RV(BoxModel({"a": 2, "b": 3}, size=5, replace=False,
+                           order_matters=False)).sim(10)
+        self.assertTrue(all(sim == ("a", "a", "b", "b", "b") for sim in sims))
+
+    def test_BoxModel_probs_sum_error(self):
+        self.assertRaises(Exception,
+                          lambda: BoxModel([0, 1], probs=[.2, .3]))
+
+    def test_BoxModel_probs_length_error(self):
+        self.assertRaises(Exception,
+                          lambda: BoxModel([0, 1], probs=[.2, .3, .5]))
+
+
+class TestEmpirical(unittest.TestCase):
+
+    def test_Empirical_shares_array(self):
+        sims = RV(Normal(0, 1)).sim(100)
+        P = Empirical(sims)
+        self.assertTrue(P.values is sims.array)
+
+    def test_Empirical_resample(self):
+        sims = RV(Exponential(1)).sim(Nsim)
+        resims = RV(Empirical(sims)).sim(Nsim)
+        self.assertTrue(set(resims).issubset(set(sims)))
+        self.assertTrue(abs(resims.mean() - 1) < .05)
+
+    def test_Empirical_Table(self):
+        P = Empirical(Table({0: 1, 1: 2, 2: 1}))
+        self.assertTrue(np.allclose(P.pdf([0, 1, 2, 3]), [.25, .5, .25, 0]))
+        self.assertTrue(np.allclose(P.cdf([-1, 0, 1.5, 2]), [0, .25, .75, 1]))
+        self.assertEqual(P.quantile(.5), 1)
+        self.assertEqual(P.quantile(.8), 2)
+
+    def test_Empirical_cdf_exact(self):
+        P = Empirical(np.arange(1000))
+        self.assertEqual(P.cdf(501), .502)
+        self.assertEqual(P.cdf(999), 1)
+        self.assertEqual(P.quantile(.5), 499)
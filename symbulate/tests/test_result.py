@@ -0,0 +1,84 @@
+import unittest
+import numpy as np
+
+from symbulate import *
+from symbulate.result import InfiniteTuple
+
+
+class TestInfiniteVector(unittest.TestCase):
+
+    def test_values(self):
+        x = InfiniteVector(lambda n: n ** 2)
+        self.assertEqual(x[3], 9)
+        self.assertEqual(x[2:5], [4, 9, 16])
+        self.assertTrue(isinstance(x[4], int))
+        self.assertEqual(x.values.array.dtype, np.int64)
+
+    def test_mixed_types(self):
+        x = InfiniteTuple(lambda n: n if n < 3 else str(n))
+        self.assertEqual(x[0:5], [0, 1, 2, "3", "4"])
+        self.assertTrue(isinstance(x[1], int))
+        y = InfiniteVector(lambda n: Vector([n, n]))
+        self.assertEqual(y[1:3], [Vector([1, 1]), Vector([2, 2])])
+
+    def test_vectorized(self):
+        calls = []
+
+        @vectorized
+        def func(n):
+            calls.append(n)
+            return n / 2
+        x = InfiniteVector(func)
+        self.assertEqual(x[0:1000], [n / 2 for n in range(1000)])
+        self.assertEqual(x[1500], 750)
+        self.assertEqual(len(calls), 2)
+
+
+class TestDiscreteTimeFunction(unittest.TestCase):
+
+    def test_values(self):
+        f = DiscreteTimeFunction(lambda n: n * n, fs=2)
+        self.assertEqual(f[-3], 9)
+        self.assertEqual(f[-3:3], Vector([9, 4, 1, 0, 1, 4]))
+        self.assertEqual(f[[1, -2, 0]], Vector([1, 4, 0]))
+        self.assertEqual(f(1.5), 9)
+        self.assertRaises(KeyError, lambda: f[1.5])
+
+    def test_vectorized(self):
+        f = DiscreteTimeFunction(vectorized(np.sin), fs=100)
+        values = f[-10 ** 5:10 ** 5]
+        self.assertEqual(len(values), 2 * 10 ** 5)
+        self.assertTrue(np.allclose(values[:3],
+                                    np.sin([-10 ** 5, -10 ** 5 + 1,
+                                            -10 ** 5 + 2])))
+        self.assertEqual(len(f.array_pos), 10 ** 5)
+        self.assertEqual(len(f.array_neg), 10 ** 5)
+
+
+class TestCumulative(unittest.TestCase):
+
+    def test_infinite(self):
+        x = InfiniteVector(lambda n: (-1) ** n * (n + 1))
+        values = np.array(x[0:20])
+        self.assertEqual(x.cumsum()[0:20], list(np.cumsum(values)))
+        self.assertEqual(x.cumprod()[0:10], list(np.cumprod(values[:10])))
+        self.assertEqual(cummax(x)[0:20],
+                         list(np.maximum.accumulate(values)))
+        self.assertEqual(cummin(x)[0:20],
+                         list(np.minimum.accumulate(values)))
+
+    def test_incremental(self):
+        x = InfiniteVector(lambda n: float(n))
+        totals = x.cumsum()
+        self.assertEqual([totals[n] for n in range(100)],
+                         [n * (n + 1) / 2 for n in range(100)])
+        self.assertEqual(totals[10 ** 5 - 1], (10 ** 5 - 1) * 10 ** 5 / 2)
+
+    def test_vectors(self):
+        x = InfiniteVector(lambda n: Vector([n, 1]))
+        self.assertEqual(x.cumsum()[3], Vector([6, 4]))
+        y = Vector([3, 1, 4, 1, 5])
+        self.assertEqual(y.cumsum(), Vector([3, 4, 8, 9, 14]))
+        self.assertEqual(y.cumprod(), Vector([3, 3, 12, 12, 60]))
+        self.assertEqual(y.cummax(), Vector([3, 3, 4, 4, 5]))
+        self.assertEqual(y.cummin(), Vector([3, 1, 1, 1, 1]))